@@ -1,5 +1,9 @@
+import asyncio
+import hashlib
+import logging
 import os
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
+from datetime import datetime
 from environs import Env
 import json
 import aiofiles
@@ -17,6 +21,90 @@ class LogSettings:
     format: str
 
 @dataclass
+class HttpSettings:
+    limit: int
+    limit_per_host: int
+    keepalive_timeout: float
+    dns_cache_ttl: int
+    connect_timeout: float
+    read_timeout: float
+    total_timeout: float
+    page_max_bytes: int
+    page_chunk_size: int
+
+@dataclass
+class StorageSettings:
+    url: str
+    state_ttl: int
+    data_ttl: int
+
+@dataclass
+class WebhookSettings:
+    mode: str
+    base_url: str
+    path: str
+    secret: str
+    host: str
+    port: int
+    workers: int
+    queue_size: int
+    max_connections: int
+    drain_timeout: float
+
+@dataclass
+class BrowserSettings:
+    contexts: int
+    max_page_uses: int
+    navigation_timeout: float
+
+@dataclass
+class ListingCacheSettings:
+    ttl: float
+    max_size: int
+    path: str
+
+@dataclass
+class ParseSettings:
+    executor: str
+    workers: int
+    max_pending: int
+    timeout: float
+
+@dataclass
+class BulkSettings:
+    max_urls: int
+    concurrency: int
+    progress_interval: float
+    max_file_bytes: int
+
+@dataclass
+class SpreadsheetSettings:
+    chunk_rows: int
+    max_file_bytes: int
+
+@dataclass
+class AdminNotifySettings:
+    group_window: float
+    per_chat_rate: float
+    global_rate: float
+    queue_size: int
+    drain_timeout: float
+
+@dataclass
+class ThrottleSettings:
+    global_rate: float
+    per_chat_rate: float
+    per_chat_burst: float
+    max_retries: int
+    max_retry_after: float
+
+@dataclass
+class SubscriptionSettings:
+    positive_ttl: float
+    negative_ttl: float
+    max_size: int
+
+@dataclass(frozen=True)
 class ChinaConfig:
     dealer_commission: int
     documents_delivery_cny: int
@@ -26,7 +114,7 @@ class ChinaConfig:
     lab_svh_not_kazan_rub: int
     other_expenses_rub: int
 
-@dataclass
+@dataclass(frozen=True)
 class KoreaConfig:
     dealer_commission_krw: int
     inland_transport_krw: int
@@ -36,11 +124,11 @@ class KoreaConfig:
     car_preparation_rub: int
     other_expenses_rub: int
 
-@dataclass
+@dataclass(frozen=True)
 class GeneralConfig:
     delivery_to_region_rub: int
 
-@dataclass
+@dataclass(frozen=True)
 class UserCalcConfig:
     china: ChinaConfig
     korea: KoreaConfig
@@ -50,7 +138,17 @@ class UserCalcConfig:
 class Config:
     bot: TgBot
     log: LogSettings
-    calc: UserCalcConfig
+    http: HttpSettings
+    storage: StorageSettings
+    webhook: WebhookSettings
+    browser: BrowserSettings
+    listing_cache: ListingCacheSettings
+    parse: ParseSettings
+    bulk: BulkSettings
+    spreadsheet: SpreadsheetSettings
+    admin_notify: AdminNotifySettings
+    throttle: ThrottleSettings
+    subscription: SubscriptionSettings
 
 def get_project_root() -> str:
     return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -66,18 +164,139 @@ async def load_user_calc_config(path: str = 'config/user_calc_config.json') -> U
             general=GeneralConfig(**data['general'])
         )
 
+_config_write_lock = asyncio.Lock()
+
+def write_file_atomic(path: str, content: str):
+    directory = os.path.dirname(path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+def _append_line(path: str, line: str):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(line + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+# Readers only ever see the old or the new file: the new content is written to a temp
+# file, fsynced and renamed over the original.
 async def save_user_calc_config(config: UserCalcConfig, path: str = 'config/user_calc_config.json'):
     if not os.path.isabs(path):
         path = os.path.join(get_project_root(), path)
-    async with aiofiles.open(path, 'w', encoding='utf-8') as f:
-        await f.write(json.dumps(asdict(config), indent=4))
+    content = json.dumps(asdict(config), indent=4)
+    async with _config_write_lock:
+        await asyncio.to_thread(write_file_atomic, path, content)
+
+async def append_user_calc_config_journal(entry: dict, path: str = 'config/user_calc_config.journal'):
+    if not os.path.isabs(path):
+        path = os.path.join(get_project_root(), path)
+    line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+    async with _config_write_lock:
+        await asyncio.to_thread(_append_line, path, line)
+
+# Keeps the parsed UserCalcConfig in memory. Snapshots are immutable and replaced as a
+# whole, and `version` is a hash of the contents, so it changes with every edit, whether
+# it came from save() or from the file being edited outside the bot (picked up by polling
+# its mtime), and stays the same across restarts and processes. Field edits are
+# serialized and each one is appended to a journal as a single (old, new) line.
+class UserCalcConfigService:
+    def __init__(self, path: str = 'config/user_calc_config.json', poll_interval: float = 5.0,
+                 journal_path: str = 'config/user_calc_config.journal'):
+        if not os.path.isabs(path):
+            path = os.path.join(get_project_root(), path)
+        if not os.path.isabs(journal_path):
+            journal_path = os.path.join(get_project_root(), journal_path)
+        self.path = path
+        self.journal_path = journal_path
+        self._update_lock = asyncio.Lock()
+        self.poll_interval = poll_interval
+        self.version = ''
+        self._current: UserCalcConfig | None = None
+        self._mtime_ns: int | None = None
+        self._watcher: asyncio.Task | None = None
+
+    @property
+    def current(self) -> UserCalcConfig:
+        return self._current
+
+    async def load(self) -> UserCalcConfig:
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        self._set(await load_user_calc_config(self.path), mtime_ns)
+        return self._current
+
+    async def save(self, config: UserCalcConfig) -> UserCalcConfig:
+        await save_user_calc_config(config, self.path)
+        self._set(config, os.stat(self.path).st_mtime_ns)
+        return config
+
+    async def update_field(self, section: str, field: str, value: int,
+                           user_id: int | None = None) -> UserCalcConfig:
+        async with self._update_lock:
+            old_value = getattr(getattr(self._current, section), field)
+            updated_section = replace(getattr(self._current, section), **{field: value})
+            config = await self.save(replace(self._current, **{section: updated_section}))
+            await append_user_calc_config_journal({
+                'ts': datetime.now().isoformat(timespec='seconds'),
+                'user_id': user_id,
+                'section': section,
+                'field': field,
+                'old': old_value,
+                'new': value
+            }, self.journal_path)
+            return config
+
+    def start(self):
+        if self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+
+    def _set(self, config: UserCalcConfig, mtime_ns: int):
+        self._current = config
+        self._mtime_ns = mtime_ns
+        # Derived from the values themselves, so every process and every restart agrees on
+        # it and cached results keyed by it are never reused for a different config.
+        payload = json.dumps(asdict(config), sort_keys=True)
+        self.version = hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+            except OSError:
+                continue
+            if mtime_ns == self._mtime_ns:
+                continue
+            try:
+                await self.load()
+                logging.info(f"Reloaded {self.path} (version {self.version})")
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                # Wait for the next change instead of re-reading a broken file every poll.
+                self._mtime_ns = mtime_ns
+                logging.warning(f"Could not reload {self.path}, keeping version {self.version}: {e}")
 
 async def load_config(path: str | None = None) -> Config:
     env: Env = Env()
     env.read_env(path)
 
-    calc_config = await load_user_calc_config()
-
     return Config(
         bot=TgBot(
             token=env('BOT_TOKEN'),
@@ -86,5 +305,77 @@ async def load_config(path: str | None = None) -> Config:
             channel_url=env('CHANNEL_URL')
         ),
         log=LogSettings(level=env('LOG_LEVEL'), format=env('LOG_FORMAT')),
-        calc=calc_config
+        http=HttpSettings(
+            limit=env.int('HTTP_LIMIT', 100),
+            limit_per_host=env.int('HTTP_LIMIT_PER_HOST', 10),
+            keepalive_timeout=env.float('HTTP_KEEPALIVE_TIMEOUT', 30),
+            dns_cache_ttl=env.int('HTTP_DNS_CACHE_TTL', 300),
+            connect_timeout=env.float('HTTP_CONNECT_TIMEOUT', 10),
+            read_timeout=env.float('HTTP_READ_TIMEOUT', 20),
+            total_timeout=env.float('HTTP_TOTAL_TIMEOUT', 40),
+            page_max_bytes=env.int('HTTP_PAGE_MAX_BYTES', 3_000_000),
+            page_chunk_size=env.int('HTTP_PAGE_CHUNK_SIZE', 65536)
+        ),
+        storage=StorageSettings(
+            url=env('FSM_STORAGE_URL', 'file://data/fsm_storage.json'),
+            state_ttl=env.int('FSM_STATE_TTL', 86400),
+            data_ttl=env.int('FSM_DATA_TTL', 86400)
+        ),
+        webhook=WebhookSettings(
+            mode=env('BOT_MODE', 'polling'),
+            base_url=env('WEBHOOK_BASE_URL', ''),
+            path=env('WEBHOOK_PATH', '/webhook'),
+            secret=env('WEBHOOK_SECRET', ''),
+            host=env('WEBHOOK_HOST', '0.0.0.0'),
+            port=env.int('WEBHOOK_PORT', 8080),
+            workers=env.int('WEBHOOK_WORKERS', 16),
+            queue_size=env.int('WEBHOOK_QUEUE_SIZE', 256),
+            max_connections=env.int('WEBHOOK_MAX_CONNECTIONS', 40),
+            drain_timeout=env.float('WEBHOOK_DRAIN_TIMEOUT', 30)
+        ),
+        browser=BrowserSettings(
+            contexts=env.int('BROWSER_CONTEXTS', 2),
+            max_page_uses=env.int('BROWSER_MAX_PAGE_USES', 50),
+            navigation_timeout=env.float('BROWSER_NAVIGATION_TIMEOUT', 30)
+        ),
+        listing_cache=ListingCacheSettings(
+            ttl=env.float('LISTING_CACHE_TTL', 3600),
+            max_size=env.int('LISTING_CACHE_MAX_SIZE', 1000),
+            path=env('LISTING_CACHE_PATH', 'data/listing_cache.json')
+        ),
+        parse=ParseSettings(
+            executor=env('PARSE_EXECUTOR', 'process'),
+            workers=env.int('PARSE_WORKERS', 2),
+            max_pending=env.int('PARSE_MAX_PENDING', 32),
+            timeout=env.float('PARSE_TIMEOUT', 15)
+        ),
+        bulk=BulkSettings(
+            max_urls=env.int('BULK_MAX_URLS', 50),
+            concurrency=env.int('BULK_CONCURRENCY', 5),
+            progress_interval=env.float('BULK_PROGRESS_INTERVAL', 2),
+            max_file_bytes=env.int('BULK_MAX_FILE_BYTES', 1_000_000)
+        ),
+        spreadsheet=SpreadsheetSettings(
+            chunk_rows=env.int('SPREADSHEET_CHUNK_ROWS', 5000),
+            max_file_bytes=env.int('SPREADSHEET_MAX_FILE_BYTES', 20_000_000)
+        ),
+        admin_notify=AdminNotifySettings(
+            group_window=env.float('ADMIN_NOTIFY_GROUP_WINDOW', 30),
+            per_chat_rate=env.float('ADMIN_NOTIFY_PER_CHAT_RATE', 1),
+            global_rate=env.float('ADMIN_NOTIFY_GLOBAL_RATE', 25),
+            queue_size=env.int('ADMIN_NOTIFY_QUEUE_SIZE', 1000),
+            drain_timeout=env.float('ADMIN_NOTIFY_DRAIN_TIMEOUT', 5)
+        ),
+        throttle=ThrottleSettings(
+            global_rate=env.float('THROTTLE_GLOBAL_RATE', 25),
+            per_chat_rate=env.float('THROTTLE_PER_CHAT_RATE', 1),
+            per_chat_burst=env.float('THROTTLE_PER_CHAT_BURST', 3),
+            max_retries=env.int('THROTTLE_MAX_RETRIES', 3),
+            max_retry_after=env.float('THROTTLE_MAX_RETRY_AFTER', 60)
+        ),
+        subscription=SubscriptionSettings(
+            positive_ttl=env.float('SUBSCRIPTION_CACHE_POSITIVE_TTL', 300),
+            negative_ttl=env.float('SUBSCRIPTION_CACHE_NEGATIVE_TTL', 30),
+            max_size=env.int('SUBSCRIPTION_CACHE_MAX_SIZE', 10000)
+        )
     )
\ No newline at end of file
@@ -1,39 +1,74 @@
 
 
+from bisect import bisect_left
+from dataclasses import dataclass
+
+
+# Rows are (upper_limit, value...) with inclusive upper limits; a lookup returns the
+# first bracket whose limit is >= the value, or the last bracket past the end.
+@dataclass(frozen=True, slots=True)
+class BracketTable:
+    limits: tuple[float, ...]
+    values: tuple
+
+    @classmethod
+    def from_rows(cls, rows: list[tuple]) -> 'BracketTable':
+        rows = sorted(rows, key=lambda row: row[0])
+        return cls(
+            limits=tuple(row[0] for row in rows),
+            values=tuple(row[1] if len(row) == 2 else tuple(row[1:]) for row in rows)
+        )
+
+    def lookup(self, value):
+        index = bisect_left(self.limits, value)
+        if index == len(self.limits):
+            index -= 1
+        return self.values[index]
+
+
 CUSTOMS_PAYMENTS_RATES = {
     'up_to_3': {
-        'by_cost': [
+        # (cost_eur limit, share of cost, minimum EUR per cm³)
+        'by_cost': BracketTable.from_rows([
             (8500, 0.54, 2.5), (16700, 0.48, 3.5), (42300, 0.48, 5.5),
             (84500, 0.48, 7.5), (169000, 0.48, 15), (float('inf'), 0.48, 20)
-        ]
+        ])
     },
     '3_to_5': {
-        'by_volume': [
+        'by_volume': BracketTable.from_rows([
             (1000, 1.5), (1500, 1.7), (1800, 2.5), (2300, 2.7),
             (3000, 3.0), (float('inf'), 3.6)
-        ]
+        ])
     },
     '5_to_7': {
-        'by_volume': [
+        'by_volume': BracketTable.from_rows([
             (1000, 3.0), (1500, 3.2), (1800, 3.5), (2300, 4.8),
             (3000, 5.0), (float('inf'), 5.7)
-        ]
+        ])
     }
 }
 
 RECYCLING_FEE_RATES = {
     'electric_hybrid': {'up_to_3': 3400, 'older': 5200},
     'ice': {
-        'up_to_3': [(3000, 3400), (3500, 2153400), (float('inf'), 2742200)],
-        'older': [(3000, 5200), (3500, 3296800), (float('inf'), 3604800)]
+        'up_to_3': BracketTable.from_rows([(3000, 3400), (3500, 2153400), (float('inf'), 2742200)]),
+        'older': BracketTable.from_rows([(3000, 5200), (3500, 3296800), (float('inf'), 3604800)])
     }
 }
 
-CUSTOMS_CLEARANCE_FEES = [
+CUSTOMS_CLEARANCE_FEES = BracketTable.from_rows([
     (200000, 1067), (450000, 2134), (1200000, 4269), (2700000, 11746),
     (4200000, 16524), (5500000, 21344), (7000000, 27540), (8000000, 30000),
     (9000000, 30000), (10000000, 30000), (float('inf'), 30000)
-]
+])
+
+# (power_hp limit, RUB per hp)
+EXCISE_TAX_RATES = BracketTable.from_rows([
+    (90, 0), (150, 61), (200, 574), (300, 955),
+    (400, 1628), (500, 1685), (float('inf'), 1740)
+])
+
+KW_PER_HP = 0.7355
 
 COUNTRY_CURRENCY_MAP = {
     'china': 'CNY',
@@ -11,7 +11,9 @@ from keyboards.admin_keyboards import (
     create_korea_admin_menu_keyboard,
     create_edit_keyboard
 )
-from config.config import load_user_calc_config, save_user_calc_config, Config
+from config.config import Config, UserCalcConfig, UserCalcConfigService
+from middlewares.request_throttle_middleware import RequestThrottleMiddleware
+from services.parse_pool import ParsePool
 
 admin_router = Router()
 
@@ -29,14 +31,31 @@ async def process_admin_command(message: Message, state: FSMContext, config: Con
         )
         await state.set_state(AdminFSM.select_country)
 
+@admin_router.message(Command("stats"))
+async def process_stats_command(message: Message, config: Config, request_throttle: RequestThrottleMiddleware,
+                                parse_pool: ParsePool):
+    if message.from_user.id not in config.bot.admin_ids:
+        return
+    throttle = request_throttle.stats
+    await message.answer(LEXICON_RU['stats_message'].format(
+        queue_depth=throttle.queue_depth,
+        sent=throttle.sent,
+        flood_waits=throttle.flood_waits,
+        average_wait=throttle.average_wait_time,
+        max_wait=throttle.max_wait_time,
+        parse_pending=parse_pool.stats.pending,
+        parse_completed=parse_pool.stats.completed,
+        parse_rejected=parse_pool.stats.rejected,
+        parse_average=parse_pool.stats.average_parse_time * 1000
+    ))
+
 @admin_router.callback_query(F.data == 'exit_admin', StateFilter(AdminFSM.select_country))
 async def process_exit_admin_press(callback: CallbackQuery, state: FSMContext):
     await callback.message.delete()
     await state.clear()
 
 @admin_router.callback_query(F.data == 'admin_china', StateFilter(AdminFSM.select_country))
-async def process_admin_china_press(callback: CallbackQuery, state: FSMContext):
-    calc_config = await load_user_calc_config()
+async def process_admin_china_press(callback: CallbackQuery, state: FSMContext, calc_config: UserCalcConfig):
     await callback.message.edit_text(
         text=LEXICON_RU['admin_panel'],
         reply_markup=create_china_admin_menu_keyboard(calc_config)
@@ -44,8 +63,7 @@ async def process_admin_china_press(callback: CallbackQuery, state: FSMContext):
     await state.set_state(AdminFSM.menu)
 
 @admin_router.callback_query(F.data == 'admin_korea', StateFilter(AdminFSM.select_country))
-async def process_admin_korea_press(callback: CallbackQuery, state: FSMContext):
-    calc_config = await load_user_calc_config()
+async def process_admin_korea_press(callback: CallbackQuery, state: FSMContext, calc_config: UserCalcConfig):
     await callback.message.edit_text(
         text=LEXICON_RU['admin_panel'],
         reply_markup=create_korea_admin_menu_keyboard(calc_config)
@@ -72,9 +90,8 @@ async def process_edit_press(callback: CallbackQuery, state: FSMContext):
     await state.set_state(AdminFSM.edit_param)
 
 @admin_router.callback_query(F.data.startswith('back_admin_'), StateFilter(AdminFSM.edit_param))
-async def process_back_admin_press(callback: CallbackQuery, state: FSMContext):
+async def process_back_admin_press(callback: CallbackQuery, state: FSMContext, calc_config: UserCalcConfig):
     country = callback.data.split('_')[-1]
-    calc_config = await load_user_calc_config()
     if country == 'china':
         await callback.message.edit_text(
             text=LEXICON_RU['admin_panel'],
@@ -88,20 +105,18 @@ async def process_back_admin_press(callback: CallbackQuery, state: FSMContext):
     await state.set_state(AdminFSM.menu)
 
 @admin_router.message(StateFilter(AdminFSM.edit_param), F.text)
-async def process_new_value_sent(message: Message, state: FSMContext):
+async def process_new_value_sent(message: Message, state: FSMContext, calc_config_service: UserCalcConfigService):
     data = await state.get_data()
     param_to_edit = data.get('param_to_edit')
     country, field = param_to_edit.split('_', 1)
     new_value = message.text
 
     if new_value.isdigit():
-        calc_config = await load_user_calc_config()
-        country_config = getattr(calc_config, country)
-        setattr(country_config, field, int(new_value))
-        await save_user_calc_config(calc_config)
+        calc_config = await calc_config_service.update_field(
+            country, field, int(new_value), user_id=message.from_user.id
+        )
 
         await message.answer(text=LEXICON_RU['value_updated'])
-        calc_config = await load_user_calc_config()
         if country == 'china':
             await message.answer(
                 text=LEXICON_RU['admin_panel'],
@@ -13,9 +13,11 @@ from keyboards.keyboards import (
     create_engine_type_keyboard, create_kazan_question_keyboard, create_hybrid_type_keyboard,
     create_restart_keyboard
 )
-from services.calculator import calculate_cost
+from services.cache import get_rates_snapshot
+from services.calculator import CostCalculator, calculation_key
 from services.menu_utils import send_start_menu
-from config.config import load_user_calc_config, Config
+from config.config import Config, UserCalcConfig
+from config.rules_config import KW_PER_HP
 
 def format_number(n):
     return f"{n:,}".replace(",", " ")
@@ -39,6 +41,33 @@ COUNTRY_INFO = {
     'korea': {'symbol': '₩', 'name': 'вонах'}
 }
 
+def _calculation_inputs(data: dict) -> tuple:
+    return (
+        data.get('year'),
+        data['cost'],
+        data['country'],
+        data.get('volume', 0),
+        data['engine_type'],
+        data.get('is_from_kazan'),
+        data.get('power', 0)
+    )
+
+
+async def get_session_costs(state: FSMContext, data: dict, calc_config: UserCalcConfig,
+                            calc_config_version: str) -> dict:
+    inputs = _calculation_inputs(data)
+    snapshot = await get_rates_snapshot()
+    key = calculation_key(inputs, snapshot.fetched_for, calc_config_version)
+
+    cached = data.get('calc_result')
+    if cached and cached.get('key') == key:
+        return cached['costs']
+
+    costs = CostCalculator(snapshot.rates, calc_config).calculate(*inputs).as_dict()
+    await state.update_data(calc_result={'key': key, 'costs': costs})
+    return costs
+
+
 def get_calculation_details(data, costs):
     currency_symbol = (COUNTRY_INFO.get(data['country'], {}).get('symbol', ''))
 
@@ -79,20 +108,10 @@ def get_calculation_details(data, costs):
     return params_section, payments_section, total_cost_rub_formatted
 
 
-async def send_calculation_result(message_or_callback, state: FSMContext, config: Config):
+async def send_calculation_result(message_or_callback, state: FSMContext, config: Config,
+                                  calc_config: UserCalcConfig, calc_config_version: str):
     data = await state.get_data()
-    calc_config = await load_user_calc_config()
-    
-    costs = await calculate_cost(
-        data.get('year'), 
-        data['cost'], 
-        data['country'], 
-        data.get('volume', 0), 
-        calc_config, 
-        data['engine_type'], 
-        data.get('is_from_kazan'), 
-        data.get('power', 0)
-    )
+    costs = await get_session_costs(state, data, calc_config, calc_config_version)
 
     params_section, payments_section, total_cost_rub_formatted = get_calculation_details(data, costs)
     
@@ -125,20 +144,10 @@ async def send_calculation_result(message_or_callback, state: FSMContext, config
 
 
 @calculator_router.callback_query(F.data == 'detailed_calculation', StateFilter(CalculatorFSM.result))
-async def process_detailed_calculation_press(callback: CallbackQuery, state: FSMContext):
+async def process_detailed_calculation_press(callback: CallbackQuery, state: FSMContext,
+                                            calc_config: UserCalcConfig, calc_config_version: str):
     data = await state.get_data()
-    calc_config = await load_user_calc_config()
-
-    costs = await calculate_cost(
-        data.get('year'),
-        data['cost'],
-        data['country'],
-        data.get('volume', 0),
-        calc_config,
-        data['engine_type'],
-        data.get('is_from_kazan'),
-        data.get('power', 0)
-    )
+    costs = await get_session_costs(state, data, calc_config, calc_config_version)
 
     params_section, main_payments_section, total_cost_rub_formatted = get_calculation_details(data, costs)
 
@@ -274,11 +283,8 @@ async def process_engine_type_press(callback: CallbackQuery, state: FSMContext):
 @calculator_router.callback_query(StateFilter(CalculatorFSM.hybrid_type))
 async def process_hybrid_type_press(callback: CallbackQuery, state: FSMContext):
     hybrid_type = callback.data
-    await state.update_data(hybrid_type=hybrid_type)
-    if hybrid_type == 'sequential_hybrid':
-        await state.update_data(engine_type='electro')
-    else:
-        await state.update_data(engine_type='ice')
+    engine_type = 'electro' if hybrid_type == 'sequential_hybrid' else 'ice'
+    await state.update_data(hybrid_type=hybrid_type, engine_type=engine_type)
     await callback.message.edit_text(
         text=LEXICON_RU['select_country'],
         reply_markup=create_country_keyboard()
@@ -291,8 +297,7 @@ async def process_hybrid_type_press(callback: CallbackQuery, state: FSMContext):
 @calculator_router.callback_query(StateFilter(CalculatorFSM.country))
 async def process_country_sent(callback: CallbackQuery, state: FSMContext):
     country = callback.data
-    await state.update_data(country=country)
-    data = await state.get_data()
+    data = await state.update_data(country=country)
 
     if data['engine_type'] == 'electro' or data.get('hybrid_type') == 'sequential_hybrid':
         await callback.message.edit_text(
@@ -312,14 +317,16 @@ async def process_country_sent(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 @calculator_router.callback_query(StateFilter(CalculatorFSM.is_from_kazan))
-async def process_kazan_question_answer(callback: CallbackQuery, state: FSMContext, config: Config):
+async def process_kazan_question_answer(callback: CallbackQuery, state: FSMContext, config: Config,
+                                        calc_config: UserCalcConfig, calc_config_version: str):
     answer = callback.data.removeprefix('kazan_')
-    await state.update_data(is_from_kazan=answer)
     data = await state.get_data()
     prompt_message_id = data.get('prompt_message_id')
 
     if data['engine_type'] == 'electro':
-        await state.update_data(volume=0)
+        await state.update_data(is_from_kazan=answer, volume=0)
+    else:
+        await state.update_data(is_from_kazan=answer)
 
     if prompt_message_id:
         try:
@@ -327,7 +334,7 @@ async def process_kazan_question_answer(callback: CallbackQuery, state: FSMConte
         except TelegramAPIError: 
             pass
             
-    await send_calculation_result(callback, state, config)
+    await send_calculation_result(callback, state, config, calc_config, calc_config_version)
     await callback.answer()
 
 @calculator_router.message(StateFilter(CalculatorFSM.power), F.text)
@@ -370,7 +377,7 @@ async def process_power_sent(message: Message, state: FSMContext):
             await state.update_data(power=power_value_kw, power_unit=power_unit_display, power_display=power_kw_val)
         else: 
             power_hp_val = float(re.sub(r'[^0-9.]', '', power_text))
-            power_value_kw = power_hp_val * 0.7355
+            power_value_kw = power_hp_val * KW_PER_HP
             power_unit_display = 'л.с.'
             await state.update_data(power=power_value_kw, power_unit=power_unit_display, power_display=power_hp_val)
 
@@ -414,7 +421,6 @@ async def process_cost_sent(message: Message, state: FSMContext, config: Config)
     cost_text = message.text.replace(' ', '').replace(',', '')
     if cost_text.isdigit():
         await state.update_data(cost=int(cost_text))
-        data = await state.get_data() 
 
         if prompt_message_id:
             await message.bot.edit_message_text(
@@ -449,9 +455,8 @@ async def process_volume_sent(message: Message, state: FSMContext):
     prompt_message_id = data.get('prompt_message_id')
 
     if message.text.isdigit():
-        await state.update_data(volume=int(message.text))
-        data = await state.get_data() 
-        
+        data = await state.update_data(volume=int(message.text))
+
         currency_text = COUNTRY_INFO.get(data['country'], {}).get('name', '')
         
         if prompt_message_id:
@@ -2,7 +2,6 @@ from aiogram import Router, Bot
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
-from aiogram.enums import ChatMemberStatus
 from aiogram import F
 
 from lexicon.lexicon import LEXICON_RU
@@ -10,19 +9,14 @@ from keyboards.keyboards import create_channel_keyboard, create_restart_keyboard
 from handlers.calculator_handlers import CalculatorFSM
 from services.menu_utils import send_start_menu
 from config.config import Config
+from services.subscription_cache import SubscriptionChecker
 
 common_router = Router()
 
 @common_router.message(CommandStart())
-async def process_start_command(message: Message, state: FSMContext, bot: Bot, config: Config):
-    user_id = message.from_user.id
-    is_admin = user_id in config.bot.admin_ids
-    is_member = False
-    if not is_admin:
-        member = await bot.get_chat_member(chat_id=config.bot.channel_id, user_id=user_id)
-        is_member = member.status in [ChatMemberStatus.MEMBER, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.CREATOR]
-
-    if is_admin or is_member:
+async def process_start_command(message: Message, state: FSMContext, bot: Bot, config: Config,
+                                subscriptions: SubscriptionChecker):
+    if await subscriptions.is_subscribed(bot, message.from_user.id):
         await send_start_menu(message, state)
     else:
         await message.answer(
@@ -39,15 +33,9 @@ async def process_exit_press(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 @common_router.callback_query(F.data == '/start')
-async def process_start_callback(callback: CallbackQuery, state: FSMContext, bot: Bot, config: Config):
-    user_id = callback.from_user.id
-    is_admin = user_id in config.bot.admin_ids
-    is_member = False
-    if not is_admin:
-        member = await bot.get_chat_member(chat_id=config.bot.channel_id, user_id=user_id)
-        is_member = member.status in [ChatMemberStatus.MEMBER, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.CREATOR]
-
-    if is_admin or is_member:
+async def process_start_callback(callback: CallbackQuery, state: FSMContext, bot: Bot, config: Config,
+                                 subscriptions: SubscriptionChecker):
+    if await subscriptions.is_subscribed(bot, callback.from_user.id):
         await send_start_menu(callback.message, state)
     else:
         await callback.message.answer(
@@ -56,6 +44,13 @@ async def process_start_callback(callback: CallbackQuery, state: FSMContext, bot
         )
     await callback.answer()
 
+@common_router.callback_query(F.data == 'check_subscription')
+async def process_check_subscription_press(callback: CallbackQuery, state: FSMContext):
+    # SubscriptionMiddleware has already re-verified the user with force=True.
+    await callback.message.delete()
+    await send_start_menu(callback.message, state)
+    await callback.answer()
+
 @common_router.callback_query(F.data == 'restart_calculation')
 async def process_restart_calculation(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_reply_markup(reply_markup=None)
@@ -4,7 +4,7 @@ from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 
 from lexicon.lexicon import LEXICON_RU
-from services.cache import get_rates
+from services.cache import get_rates_snapshot
 from keyboards.keyboards import create_rates_keyboard
 
 rates_router = Router()
@@ -12,7 +12,8 @@ rates_router = Router()
 @rates_router.message(Command(commands=['exchange']))
 async def process_rates_press(message: Message, state: FSMContext):
     await message.delete()
-    rates = await get_rates()
+    snapshot = await get_rates_snapshot()
+    rates = snapshot.rates
 
     def format_rate(currency_code):
         rate = rates.get(currency_code, 'N/A')
@@ -25,6 +26,8 @@ async def process_rates_press(message: Message, state: FSMContext):
     rates_text += f"{format_rate('USD')}\n"
     rates_text += f"{format_rate('CNY')}\n"
     rates_text += f"{format_rate('KRW')}\n"
+    if snapshot.is_stale:
+        rates_text += f"\n{LEXICON_RU['rates_stale']} {snapshot.fetched_for.strftime('%d.%m.%Y')}\n"
 
     await message.answer(
         text=rates_text,
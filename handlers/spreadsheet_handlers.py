@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import os
+import tempfile
+
+from aiogram import Router, F
+from aiogram.exceptions import TelegramAPIError
+from aiogram.filters import StateFilter
+from aiogram.types import Message, FSInputFile
+
+from config.config import Config, UserCalcConfig
+from handlers.calculator_handlers import CalculatorFSM
+from lexicon.lexicon import LEXICON_RU
+from services.cache import get_rates_snapshot
+from services.spreadsheet_pricing import SpreadsheetError, price_spreadsheet
+
+spreadsheet_router = Router()
+
+# Lists of links sent while the bot waits for a URL belong to url_router.
+@spreadsheet_router.message(~StateFilter(CalculatorFSM.url), F.document.file_name.regexp(r'(?i)\.(csv|xlsx)$'))
+async def process_spreadsheet_sent(message: Message, config: Config, calc_config: UserCalcConfig):
+    document = message.document
+    if document.file_size and document.file_size > config.spreadsheet.max_file_bytes:
+        await message.answer(LEXICON_RU['spreadsheet_too_large'])
+        return
+
+    # Only the already validated extension is taken from the uploaded name.
+    file_name = 'source' + os.path.splitext(document.file_name)[1].lower()
+    processing_message = await message.answer(LEXICON_RU['spreadsheet_processing'])
+    try:
+        snapshot = await get_rates_snapshot()
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, file_name)
+            destination = os.path.join(directory, 'prices.xlsx')
+            await message.bot.download(document, destination=source)
+            summary = await asyncio.to_thread(
+                price_spreadsheet, source, file_name, destination,
+                snapshot.rates, calc_config, config.spreadsheet.chunk_rows
+            )
+            await message.answer_document(
+                FSInputFile(destination, filename='prices.xlsx'),
+                caption=LEXICON_RU['spreadsheet_done'].format(rows=summary.rows, priced=summary.priced)
+            )
+    except SpreadsheetError as e:
+        await message.answer(LEXICON_RU['spreadsheet_failed'].format(error=e))
+    except Exception as e:
+        logging.error(f"Failed to price spreadsheet {document.file_name!r}: {e}")
+        await message.answer(LEXICON_RU['spreadsheet_error'])
+    finally:
+        try:
+            await processing_message.delete()
+        except TelegramAPIError:
+            pass
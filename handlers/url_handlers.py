@@ -1,32 +1,27 @@
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import Message, CallbackQuery, BufferedInputFile
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
-import aiohttp
-import datetime
+from aiogram.exceptions import TelegramBadRequest
+import asyncio
+import io
+import time
 
 from lexicon.lexicon import LEXICON_RU
 from services.parser import parse_encar_requests, validate_and_normalize_url, parse_che168_requests
-from config.config import load_config, Config
-from handlers.calculator_handlers import send_calculation_result, CalculatorFSM
-from keyboards.keyboards import create_kazan_question_keyboard, create_kazan_question_url_keyboard, create_calculator_only_keyboard
+from config.config import Config, UserCalcConfig
+from services.http_client import HttpClient, FetchError
+from services.admin_notifier import AdminNotifier
+from services.browser_pool import BrowserPool
+from services.listing_cache import ListingCache
+from services.parse_pool import ParsePool, ParsePoolBusy
+from services.calculator import get_age_category_val
+from services.bulk_pricing import extract_listing_urls, price_listings, format_bulk_table, format_bulk_csv
+from handlers.calculator_handlers import CalculatorFSM
+from keyboards.keyboards import create_kazan_question_url_keyboard
 
 url_router = Router()
 
-def get_age_category_val(car_year: int, car_month: int = 1) -> str:
-    now = datetime.datetime.now()
-    current_year = now.year
-    current_month = now.month
-    
-    age_in_months = (current_year - car_year) * 12 + (current_month - car_month)
-    
-    if age_in_months < 36:
-        return "year_less_3"
-    elif 36 <= age_in_months <= 60:
-        return "year_3_5"
-    else:
-        return "year_more_5"
-
 def get_age_category_display(age_val: str) -> str:
     if age_val == "year_less_3":
         return "младше 3"
@@ -35,6 +30,64 @@ def get_age_category_display(age_val: str) -> str:
     else:
         return "старше 5"
 
+async def load_listing(url: str, http: HttpClient, browser_pool: BrowserPool,
+                       parse_pool: ParsePool) -> tuple[dict | None, str | None]:
+    if 'encar.com' in url:
+        return await parse_encar_requests(url, http.session, browser_pool)
+    try:
+        page = await http.fetch_page(url)
+    except FetchError as e:
+        return None, str(e)
+    except asyncio.TimeoutError:
+        return None, "Страница загружалась слишком долго"
+    try:
+        return await parse_pool.run(parse_che168_requests, page.text)
+    except ParsePoolBusy:
+        return None, "Сервис разбора страниц перегружен, попробуйте через минуту"
+    except asyncio.TimeoutError:
+        return None, "Страница разбиралась слишком долго"
+
+async def process_bulk(message: Message, urls: list[str], config: Config, calc_config: UserCalcConfig,
+                       http: HttpClient, browser_pool: BrowserPool, listing_cache: ListingCache,
+                       parse_pool: ParsePool):
+    if len(urls) > config.bulk.max_urls:
+        await message.answer(LEXICON_RU['bulk_too_many'].format(limit=config.bulk.max_urls))
+        urls = urls[:config.bulk.max_urls]
+
+    status_message = await message.answer(LEXICON_RU['bulk_progress'].format(done=0, total=len(urls)))
+    last_edit = time.monotonic()
+
+    # One status message for the whole batch, edited at most every `progress_interval` seconds.
+    async def on_progress(done: int, total: int):
+        nonlocal last_edit
+        if done < total and time.monotonic() - last_edit < config.bulk.progress_interval:
+            return
+        last_edit = time.monotonic()
+        try:
+            await status_message.edit_text(LEXICON_RU['bulk_progress'].format(done=done, total=total))
+        except TelegramBadRequest:
+            pass
+
+    def load(url: str):
+        return listing_cache.get_or_load(url, lambda: load_listing(url, http, browser_pool, parse_pool))
+
+    rows = await price_listings(urls, load, calc_config, config.bulk.concurrency, on_progress)
+
+    priced = sum(1 for row in rows if row.total_rub is not None)
+    try:
+        await status_message.edit_text(LEXICON_RU['bulk_done'].format(total=len(rows), priced=priced))
+    except TelegramBadRequest:
+        pass
+
+    text = f"{LEXICON_RU['bulk_result_header']}\n\n{format_bulk_table(rows)}"
+    if len(text) <= 4000:
+        await message.answer(text)
+    else:
+        await message.answer_document(
+            BufferedInputFile(format_bulk_csv(rows), filename='prices.csv'),
+            caption=LEXICON_RU['bulk_result_header']
+        )
+
 @url_router.callback_query(F.data == 'calculate_by_url')
 async def process_calculate_by_url_press(callback: CallbackQuery, state: FSMContext):
     await callback.message.answer(text=LEXICON_RU['enter_url'])
@@ -42,7 +95,14 @@ async def process_calculate_by_url_press(callback: CallbackQuery, state: FSMCont
     await callback.answer()
 
 @url_router.message(StateFilter(CalculatorFSM.url), F.text)
-async def process_url_sent(message: Message, state: FSMContext, config: Config):
+async def process_url_sent(message: Message, state: FSMContext, config: Config, http: HttpClient,
+                          browser_pool: BrowserPool, listing_cache: ListingCache, parse_pool: ParsePool,
+                          calc_config: UserCalcConfig, admin_notifier: AdminNotifier):
+    urls = extract_listing_urls(message.text)
+    if len(urls) > 1:
+        await process_bulk(message, urls, config, calc_config, http, browser_pool, listing_cache, parse_pool)
+        return
+
     url, error = validate_and_normalize_url(message.text)
     if error:
         await message.answer(error)
@@ -54,19 +114,8 @@ async def process_url_sent(message: Message, state: FSMContext, config: Config):
         car_data = None
         error = None
 
-        if 'encar.com' in url:
-            await message.answer(LEXICON_RU['encar_unavailable_with_calculator'], reply_markup=create_calculator_only_keyboard())
-            await processing_message.delete()
-            await state.clear()
-            return
-        elif 'che168.com' in url:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        html_content = await response.text()
-                        car_data, error = parse_che168_requests(html_content)
-                    else:
-                        error = f"Failed to load page, status: {response.status}"
+        if 'encar.com' in url or 'che168.com' in url:
+            car_data, error = await listing_cache.get_or_load(url, lambda: load_listing(url, http, browser_pool, parse_pool))
         else:
             await message.answer("Пожалуйста, отправьте ссылку на сайт che168.com или encar.com")
             await processing_message.delete()
@@ -81,8 +130,7 @@ async def process_url_sent(message: Message, state: FSMContext, config: Config):
         if error:
             await message.answer(f"Не удалось извлечь все необходимые данные со страницы: {error}. Пожалуйста, попробуйте другую ссылку или воспользуйтесь обычным калькулятором.")
             await processing_message.delete()
-            for admin_id in config.bot.admin_ids:
-                await message.bot.send_message(admin_id, f"Ошибка парсинга URL: {url}\n{error}")
+            admin_notifier.notify(f"Ошибка парсинга URL:\n{error}", detail=url)
             return
 
         if car_data and (car_data.get('engine_type') == 'electro' or (car_data.get('power') and not car_data.get('volume'))):
@@ -122,7 +170,27 @@ async def process_url_sent(message: Message, state: FSMContext, config: Config):
         await message.answer(user_error_message)
         await processing_message.delete()
         
-        admin_error_message = f"Произошла ошибка при обработке ссылки: {url}\nОшибка: {e}"
-        for admin_id in config.bot.admin_ids:
-            if admin_id != message.from_user.id:
-                await message.bot.send_message(admin_id, admin_error_message)
+        admin_notifier.notify(f"Произошла ошибка при обработке ссылки\nОшибка: {e}", detail=url,
+                              exclude=message.from_user.id)
+
+@url_router.message(StateFilter(CalculatorFSM.url), F.document)
+async def process_url_file_sent(message: Message, config: Config, http: HttpClient, browser_pool: BrowserPool,
+                                listing_cache: ListingCache, parse_pool: ParsePool, calc_config: UserCalcConfig):
+    document = message.document
+    if document.file_size and document.file_size > config.bulk.max_file_bytes:
+        await message.answer(LEXICON_RU['bulk_file_too_large'])
+        return
+
+    buffer = io.BytesIO()
+    await message.bot.download(document, destination=buffer)
+    raw = buffer.getvalue()
+    try:
+        text = raw.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        text = raw.decode('cp1251', errors='replace')
+
+    urls = extract_listing_urls(text)
+    if not urls:
+        await message.answer(LEXICON_RU['bulk_no_urls'])
+        return
+    await process_bulk(message, urls, config, calc_config, http, browser_pool, listing_cache, parse_pool)
@@ -1,8 +1,12 @@
+from functools import cache, lru_cache
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from lexicon.lexicon import LEXICON_RU
-from config.config import UserCalcConfig
+from config.config import ChinaConfig, KoreaConfig, UserCalcConfig
+from keyboards.keyboards import freeze_markup
 
+@cache
 def create_admin_country_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
@@ -12,34 +16,33 @@ def create_admin_country_keyboard() -> InlineKeyboardMarkup:
     builder.row(
         InlineKeyboardButton(text=LEXICON_RU['exit'], callback_data='exit_admin')
     )
-    return builder.as_markup()
+    return freeze_markup(builder)
 
-def create_china_admin_menu_keyboard(calc_config: UserCalcConfig) -> InlineKeyboardMarkup:
+# The menus show current values, so they are cached per country section: a section is a
+# frozen dataclass, and a new one only appears when an admin changes the config.
+@lru_cache(maxsize=4)
+def _create_admin_menu_keyboard(country: str, section: ChinaConfig | KoreaConfig) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
-    for field, name in LEXICON_RU['calc_config_fields']['china'].items():
+    for field, name in LEXICON_RU['calc_config_fields'][country].items():
         builder.row(
-            InlineKeyboardButton(text=f"{name}: {getattr(calc_config.china, field)}", callback_data=f"edit_china_{field}")
+            InlineKeyboardButton(text=f"{name}: {getattr(section, field)}", callback_data=f"edit_{country}_{field}")
         )
     builder.row(
         InlineKeyboardButton(text=LEXICON_RU['back'], callback_data='back_to_country_select')
     )
-    return builder.as_markup()
+    return freeze_markup(builder)
+
+def create_china_admin_menu_keyboard(calc_config: UserCalcConfig) -> InlineKeyboardMarkup:
+    return _create_admin_menu_keyboard('china', calc_config.china)
 
 def create_korea_admin_menu_keyboard(calc_config: UserCalcConfig) -> InlineKeyboardMarkup:
-    builder = InlineKeyboardBuilder()
-    for field, name in LEXICON_RU['calc_config_fields']['korea'].items():
-        builder.row(
-            InlineKeyboardButton(text=f"{name}: {getattr(calc_config.korea, field)}", callback_data=f"edit_korea_{field}")
-        )
-    builder.row(
-        InlineKeyboardButton(text=LEXICON_RU['back'], callback_data='back_to_country_select')
-    )
-    return builder.as_markup()
+    return _create_admin_menu_keyboard('korea', calc_config.korea)
 
+@cache
 def create_edit_keyboard(field: str) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     country = field.split('_')[1]
     builder.row(
         InlineKeyboardButton(text=LEXICON_RU['back'], callback_data=f'back_admin_{country}')
     )
-    return builder.as_markup()
\ No newline at end of file
+    return freeze_markup(builder)
@@ -1,8 +1,24 @@
+from functools import cache
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from pydantic import ConfigDict
 from lexicon.lexicon import LEXICON_RU
 from config.config import Config
 
+# Keyboards are built once and the same instance is sent to every user. Frozen only
+# blocks reassigning fields: the rows are still plain lists (aiogram strips the unset
+# button fields only from lists), so callers must never change a returned markup in
+# place - build a new one instead.
+class FrozenInlineKeyboardMarkup(InlineKeyboardMarkup):
+    model_config = ConfigDict(frozen=True)
+
+
+def freeze_markup(builder: InlineKeyboardBuilder) -> InlineKeyboardMarkup:
+    return FrozenInlineKeyboardMarkup(inline_keyboard=builder.export())
+
+
+@cache
 def create_main_menu_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
@@ -11,9 +27,10 @@ def create_main_menu_keyboard() -> InlineKeyboardMarkup:
     builder.row(
         InlineKeyboardButton(text=LEXICON_RU['calculate_by_url'], callback_data='calculate_by_url')
     )
-    return builder.as_markup()
+    return freeze_markup(builder)
 
 
+@cache
 def create_year_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
@@ -25,8 +42,9 @@ def create_year_keyboard() -> InlineKeyboardMarkup:
         InlineKeyboardButton(text=LEXICON_RU['back'], callback_data='back'),
         InlineKeyboardButton(text=LEXICON_RU['exit'], callback_data='exit')
     )
-    return builder.as_markup()
+    return freeze_markup(builder)
 
+@cache
 def create_country_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
@@ -36,25 +54,27 @@ def create_country_keyboard() -> InlineKeyboardMarkup:
     builder.row(
         InlineKeyboardButton(text=LEXICON_RU['back'], callback_data='back')
     )
-    return builder.as_markup()
+    return freeze_markup(builder)
 
+@cache
 def create_cost_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
         InlineKeyboardButton(text=LEXICON_RU['back'], callback_data='back'),
         InlineKeyboardButton(text=LEXICON_RU['exit'], callback_data='exit')
     )
-    return builder.as_markup()
+    return freeze_markup(builder)
 
+# Same buttons as the cost step.
 def create_volume_keyboard() -> InlineKeyboardMarkup:
-    builder = InlineKeyboardBuilder()
-    builder.row(
-        InlineKeyboardButton(text=LEXICON_RU['back'], callback_data='back'),
-        InlineKeyboardButton(text=LEXICON_RU['exit'], callback_data='exit')
-    )
-    return builder.as_markup()
+    return create_cost_keyboard()
 
 def create_after_calculation_keyboard(is_admin: bool = False) -> InlineKeyboardMarkup:
+    return _create_after_calculation_keyboard(bool(is_admin))
+
+# Cached by a positional bool so keyword and positional calls share one entry.
+@cache
+def _create_after_calculation_keyboard(is_admin: bool) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
         InlineKeyboardButton(text=LEXICON_RU['calculate_another_car'], callback_data='restart_calculation')
@@ -66,16 +86,18 @@ def create_after_calculation_keyboard(is_admin: bool = False) -> InlineKeyboardM
         builder.row(
             InlineKeyboardButton(text=LEXICON_RU['detailed_calculation'], callback_data='detailed_calculation')
         )
-    return builder.as_markup()
+    return freeze_markup(builder)
 
+@cache
 def create_restart_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
         InlineKeyboardButton(text=LEXICON_RU['calculator'], callback_data='calculator'),
         InlineKeyboardButton(text=LEXICON_RU['calculate_by_url'], callback_data='calculate_by_url')
     )
-    return builder.as_markup()
+    return freeze_markup(builder)
 
+@cache
 def create_engine_type_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
@@ -87,8 +109,9 @@ def create_engine_type_keyboard() -> InlineKeyboardMarkup:
         InlineKeyboardButton(text=LEXICON_RU['back'], callback_data='back'),
         InlineKeyboardButton(text=LEXICON_RU['exit'], callback_data='exit')
     )
-    return builder.as_markup()
+    return freeze_markup(builder)
 
+@cache
 def create_hybrid_type_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
@@ -99,8 +122,9 @@ def create_hybrid_type_keyboard() -> InlineKeyboardMarkup:
         InlineKeyboardButton(text=LEXICON_RU['back'], callback_data='back'),
         InlineKeyboardButton(text=LEXICON_RU['exit'], callback_data='exit')
     )
-    return builder.as_markup()
+    return freeze_markup(builder)
 
+@cache
 def create_kazan_question_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
@@ -110,30 +134,47 @@ def create_kazan_question_keyboard() -> InlineKeyboardMarkup:
     builder.row(
         InlineKeyboardButton(text=LEXICON_RU['back'], callback_data='back')
     )
-    return builder.as_markup()
+    return freeze_markup(builder)
 
+@cache
 def create_kazan_question_url_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
         InlineKeyboardButton(text=LEXICON_RU['yes'], callback_data='kazan_yes'),
         InlineKeyboardButton(text=LEXICON_RU['no'], callback_data='kazan_no')
     )
-    return builder.as_markup()
+    return freeze_markup(builder)
 
+@cache
 def create_calculator_only_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(
         InlineKeyboardButton(text=LEXICON_RU['calculator'], callback_data='calculator')
     )
-    return builder.as_markup()
+    return freeze_markup(builder)
 
 
 def create_rates_keyboard() -> None:
     return None
 
 def create_channel_keyboard(config: Config) -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
+    return _create_channel_keyboard(config.bot.channel_url)
+
+@cache
+def _create_channel_keyboard(channel_url: str) -> InlineKeyboardMarkup:
+    return FrozenInlineKeyboardMarkup(
         inline_keyboard=[
-            [InlineKeyboardButton(text=LEXICON_RU['channel_button'], url=config.bot.channel_url)]
+            [InlineKeyboardButton(text=LEXICON_RU['channel_button'], url=channel_url)],
+            [InlineKeyboardButton(text=LEXICON_RU['check_subscription_button'], callback_data='check_subscription')]
         ]
-    )
\ No newline at end of file
+    )
+
+# Builds every static keyboard up front so the first users after a restart don't pay for it.
+def prebuild_keyboards():
+    for create in (create_main_menu_keyboard, create_year_keyboard, create_country_keyboard,
+                   create_cost_keyboard, create_restart_keyboard, create_engine_type_keyboard,
+                   create_hybrid_type_keyboard, create_kazan_question_keyboard,
+                   create_kazan_question_url_keyboard, create_calculator_only_keyboard):
+        create()
+    for is_admin in (False, True):
+        create_after_calculation_keyboard(is_admin)
\ No newline at end of file
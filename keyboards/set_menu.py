@@ -1,11 +1,15 @@
+import logging
+
 from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
 from aiogram.types import BotCommand
 from aiogram.methods import SetMyCommands
 from aiogram.types import BotCommandScopeAllPrivateChats, BotCommandScopeChat
 
 from lexicon.lexicon import LEXICON_COMMANDS_RU
+from services.admin_notifier import AdminNotifier
 
-async def set_menu(bot: Bot, admin_ids: list[int]):
+async def set_menu(bot: Bot, admin_notifier: AdminNotifier):
     # Commands for regular users (excluding /admin)
     default_commands = [
         BotCommand(command=command,
@@ -13,7 +17,10 @@ async def set_menu(bot: Bot, admin_ids: list[int]):
         for command, description in LEXICON_COMMANDS_RU.items()
         if command != '/admin'
     ]
-    await bot.set_my_commands(default_commands, scope=BotCommandScopeAllPrivateChats())
+    try:
+        await bot.set_my_commands(default_commands, scope=BotCommandScopeAllPrivateChats())
+    except TelegramAPIError as e:
+        logging.warning(f"Could not set the default command menu: {e}")
 
     # Commands for admin users (including /admin)
     admin_commands = [
@@ -21,5 +28,6 @@ async def set_menu(bot: Bot, admin_ids: list[int]):
             description=description)
         for command, description in LEXICON_COMMANDS_RU.items()
     ]
-    for admin_id in admin_ids:
-        await bot.set_my_commands(admin_commands, scope=BotCommandScopeChat(chat_id=admin_id))
\ No newline at end of file
+    await admin_notifier.for_each_admin(
+        lambda admin_id: bot.set_my_commands(admin_commands, scope=BotCommandScopeChat(chat_id=admin_id))
+    )
@@ -11,8 +11,19 @@ LEXICON_RU: dict[str, str| dict[str, str]] = {
     'calculator': '🧮 Калькулятор',
     'exchange_rates': '📈 Курс валют',
     'calculate_by_url': '🔗 Рассчитать по ссылке',
-    'enter_url': 'Пожалуйста, отправьте ссылку на страницу с автомобилем с сайта <a href="https://www.che168.com/">che168.com</a> или <a href="https://www.encar.com/">encar.com</a>.',
+    'enter_url': 'Пожалуйста, отправьте ссылку на страницу с автомобилем с сайта <a href="https://www.che168.com/">che168.com</a> или <a href="https://www.encar.com/">encar.com</a>.\n\nМожно отправить сразу несколько ссылок одним сообщением или текстовым/CSV-файлом.',
     'processing_url': 'Произвожу расчёт...',
+    'bulk_progress': '⏳ Обрабатываю ссылки: {done} из {total}',
+    'bulk_done': '✅ Обработано ссылок: {total}, рассчитано: {priced}',
+    'bulk_result_header': '📋 <b>Расчёт по списку ссылок</b>\nИтоговая стоимость указана с доставкой до Казани.',
+    'bulk_too_many': 'В одном сообщении можно отправить не больше {limit} ссылок, будут обработаны первые {limit}.',
+    'bulk_no_urls': 'В файле не найдено ссылок на che168.com или encar.com.',
+    'bulk_file_too_large': 'Файл слишком большой. Отправьте текстовый или CSV-файл со списком ссылок.',
+    'spreadsheet_processing': '⏳ Рассчитываю таблицу...',
+    'spreadsheet_done': '✅ Строк в таблице: {rows}, рассчитано: {priced}. Строки с ошибками отмечены в столбце error.',
+    'spreadsheet_failed': 'Не удалось обработать таблицу: {error}. Нужны столбцы year, engine_type, country, volume, power, cost, is_from_kazan.',
+    'spreadsheet_error': 'Не удалось обработать таблицу. Попробуйте ещё раз позже.',
+    'spreadsheet_too_large': 'Файл слишком большой для расчёта.',
     'select_year': '🗓️ Выберите период выпуска авто:',
     'year_less_3': 'Младше 3-х лет',
     'year_3_5': 'От 3 до 5 лет',
@@ -50,6 +61,7 @@ LEXICON_RU: dict[str, str| dict[str, str]] = {
     'ferry': 'Перегон',
     'other_expenses': 'Прочие расходы',
     'rates_message': '💹 Курс валют к рублю:',
+    'rates_stale': '⚠️ Сайт ЦБ РФ сейчас недоступен, показаны курсы на',
     'calculate_another_car': '🚗 Рассчитать стоимость другой машины',
     'select_engine_type': '⛽️ Выберите тип двигателя:',
     'petrol_diesel': 'Бензин/Дизель',
@@ -65,7 +77,16 @@ LEXICON_RU: dict[str, str| dict[str, str]] = {
     'vat': 'НДС',
     'subscription_required': 'Бот доступен только подписчикам<a href="https://t.me/makauto_rus"> канала</a>.',
     'channel_button': 'Подписаться',
+    'check_subscription_button': '✅ Я подписался',
     'admin_panel': '🔐 Админ-панель',
+    'stats_message': (
+        '📊 <b>Исходящие запросы к Telegram</b>\n'
+        'В очереди: {queue_depth}\nОтправлено: {sent}\nОграничений 429: {flood_waits}\n'
+        'Ожидание: в среднем {average_wait:.2f} с, максимум {max_wait:.1f} с\n\n'
+        '🧩 <b>Разбор страниц</b>\n'
+        'В работе: {parse_pending}\nРазобрано: {parse_completed}\nОтклонено: {parse_rejected}\n'
+        'Среднее время разбора: {parse_average:.0f} мс'
+    ),
     'edit_params': 'Редактировать параметры',
     'enter_new_value': 'Введите новое значение для',
     'value_updated': '✅ Значение обновлено!',
@@ -7,14 +7,28 @@ from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
-from config.config import Config, load_config
+from config.config import Config, UserCalcConfigService, load_config
 from handlers.common_handlers import common_router
 from handlers.calculator_handlers import calculator_router
 from handlers.url_handlers import url_router
+from handlers.spreadsheet_handlers import spreadsheet_router
 from handlers.rates_handlers import rates_router
 from handlers.admin_handlers import admin_router
+from keyboards.keyboards import prebuild_keyboards
 from keyboards.set_menu import set_menu
 from middlewares.subscription_middleware import SubscriptionMiddleware
+from middlewares.calc_config_middleware import CalcConfigMiddleware
+from middlewares.state_buffer_middleware import StateBufferMiddleware
+from middlewares.request_throttle_middleware import RequestThrottleMiddleware
+from services.admin_notifier import AdminNotifier
+from services.browser_pool import BrowserPool
+from services.cache import rates_provider
+from services.fsm_storage import create_storage
+from services.http_client import HttpClient
+from services.listing_cache import ListingCache
+from services.parse_pool import ParsePool
+from services.subscription_cache import SubscriptionChecker
+from services.webhook import run_webhook
 
 
 async def main():
@@ -29,22 +43,61 @@ async def main():
         token=config.bot.token,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
-    dp = Dispatcher(config=config)
-    dp.message.middleware(SubscriptionMiddleware(config=config))
-    dp.callback_query.middleware(SubscriptionMiddleware(config=config))
+    request_throttle = RequestThrottleMiddleware(config.throttle)
+    bot.session.middleware(request_throttle)
+    http = HttpClient(config.http)
+    browser_pool = BrowserPool(config.browser)
+    listing_cache = ListingCache(config.listing_cache)
+    parse_pool = ParsePool(config.parse)
+    calc_config_service = UserCalcConfigService()
+    await calc_config_service.load()
 
-    await set_menu(bot, config.bot.admin_ids)
+    subscriptions = SubscriptionChecker(config)
+    admin_notifier = AdminNotifier(bot, config.bot.admin_ids, config.admin_notify)
 
-    
+    dp = Dispatcher(storage=create_storage(config.storage), config=config, http=http, browser_pool=browser_pool,
+                    listing_cache=listing_cache, parse_pool=parse_pool,
+                    calc_config_service=calc_config_service, subscriptions=subscriptions,
+                    admin_notifier=admin_notifier, request_throttle=request_throttle)
+    dp.update.outer_middleware(CalcConfigMiddleware(calc_config_service))
+    dp.message.middleware(SubscriptionMiddleware(config=config, subscriptions=subscriptions))
+    dp.callback_query.middleware(SubscriptionMiddleware(config=config, subscriptions=subscriptions))
+    dp.message.middleware(StateBufferMiddleware())
+    dp.callback_query.middleware(StateBufferMiddleware())
+
+    prebuild_keyboards()
+    admin_notifier.start()
+    # Menus are set in the background so a slow or rate-limited API doesn't delay startup.
+    menu_task = asyncio.create_task(set_menu(bot, admin_notifier))
 
     dp.include_router(admin_router)
     dp.include_router(common_router)
     dp.include_router(calculator_router)
     dp.include_router(url_router)   
     dp.include_router(rates_router)
+    dp.include_router(spreadsheet_router)
 
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    rates_provider.start(http)
+    calc_config_service.start()
+    try:
+        if config.webhook.mode == 'webhook':
+            await run_webhook(bot, dp, config.webhook)
+        else:
+            await bot.delete_webhook(drop_pending_updates=False)
+            await dp.start_polling(bot)
+    finally:
+        menu_task.cancel()
+        await asyncio.gather(menu_task, return_exceptions=True)
+        await admin_notifier.stop()
+        await calc_config_service.stop()
+        await rates_provider.stop()
+        await listing_cache.close()
+        parse_pool.shutdown()
+        await browser_pool.stop()
+        await http.close()
+        # Polling and the webhook handler already closed the bot session; the notifier
+        # drain above may have reopened it, so it is closed once more at the very end.
+        await bot.session.close()
 
 if __name__ == '__main__':
     asyncio.run(main())
\ No newline at end of file
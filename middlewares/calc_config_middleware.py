@@ -0,0 +1,19 @@
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from config.config import UserCalcConfigService
+
+
+class CalcConfigMiddleware(BaseMiddleware):
+    def __init__(self, service: UserCalcConfigService):
+        self.service = service
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        data['calc_config'] = self.service.current
+        data['calc_config_version'] = self.service.version
+        return await handler(event, data)
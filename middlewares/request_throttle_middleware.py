@@ -0,0 +1,112 @@
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from config.config import ThrottleSettings
+from services.rate_limit import TokenBucket
+
+# Replies (calculation results, prompts) go first, edits next, cosmetic deletes last.
+PRIORITY_SEND = 0
+PRIORITY_EDIT = 1
+PRIORITY_DELETE = 2
+PRIORITIES = (
+    ('send', PRIORITY_SEND), ('copy', PRIORITY_SEND), ('forward', PRIORITY_SEND),
+    ('edit', PRIORITY_EDIT), ('delete', PRIORITY_DELETE)
+)
+MAX_CHAT_BUCKETS = 10000
+
+
+@dataclass
+class ThrottleStats:
+    waiting: dict[int, int] = field(default_factory=lambda: {priority: 0 for _, priority in PRIORITIES})
+    sent: int = 0
+    flood_waits: int = 0
+    total_wait_time: float = 0.0
+    max_wait_time: float = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self.waiting.values())
+
+    @property
+    def average_wait_time(self) -> float:
+        return self.total_wait_time / self.sent if self.sent else 0.0
+
+
+def _priority(method: TelegramMethod) -> int | None:
+    name = method.__api_method__
+    for prefix, priority in PRIORITIES:
+        if name.startswith(prefix):
+            return priority
+    return None
+
+
+# Bot session middleware that paces outgoing chat messages: each chat and the bot as a
+# whole get a token bucket, queued calls are released by priority, and a 429 pauses the
+# chat for `retry_after` seconds before the call is retried. Other API methods
+# (getUpdates, getChatMember, answerCallbackQuery, ...) pass straight through.
+class RequestThrottleMiddleware(BaseRequestMiddleware):
+    def __init__(self, settings: ThrottleSettings):
+        self.settings = settings
+        self.stats = ThrottleStats()
+        self._global_limit = TokenBucket(settings.global_rate)
+        self._chat_limits: OrderedDict[int | str, TokenBucket] = OrderedDict()
+
+    async def __call__(self, make_request: NextRequestMiddlewareType[TelegramType], bot: Bot,
+                       method: TelegramMethod[TelegramType]) -> Response[TelegramType]:
+        chat_id = getattr(method, 'chat_id', None)
+        priority = _priority(method)
+        if chat_id is None or priority is None:
+            return await make_request(bot, method)
+
+        chat_limit = self._chat_limit(chat_id)
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._wait_turn(chat_limit, priority)
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.stats.flood_waits += 1
+                if attempt > self.settings.max_retries or e.retry_after > self.settings.max_retry_after:
+                    raise
+                logging.warning(
+                    f"{method.__api_method__} to {chat_id} hit flood control, retrying in {e.retry_after}s "
+                    f"(queue depth {self.stats.queue_depth})"
+                )
+                chat_limit.pause(e.retry_after)
+                continue
+            self.stats.sent += 1
+            return response
+
+    async def _wait_turn(self, chat_limit: TokenBucket, priority: int):
+        started = time.monotonic()
+        self.stats.waiting[priority] += 1
+        try:
+            await chat_limit.acquire(priority)
+            await self._global_limit.acquire(priority)
+        finally:
+            self.stats.waiting[priority] -= 1
+        waited = time.monotonic() - started
+        self.stats.total_wait_time += waited
+        self.stats.max_wait_time = max(self.stats.max_wait_time, waited)
+        if waited >= 1:
+            logging.info(f"Outgoing request waited {waited:.1f}s, queue depth {self.stats.queue_depth}")
+
+    def _chat_limit(self, chat_id: int | str) -> TokenBucket:
+        chat_limit = self._chat_limits.get(chat_id)
+        if chat_limit is None:
+            chat_limit = TokenBucket(self.settings.per_chat_rate, self.settings.per_chat_burst)
+            self._chat_limits[chat_id] = chat_limit
+            while len(self._chat_limits) > MAX_CHAT_BUCKETS:
+                self._chat_limits.popitem(last=False)
+        else:
+            self._chat_limits.move_to_end(chat_id)
+        return chat_limit
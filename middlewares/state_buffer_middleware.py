@@ -0,0 +1,89 @@
+from typing import Callable, Dict, Any, Awaitable, Mapping, Optional
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.types import TelegramObject
+
+
+# FSMContext that serves the whole update from one snapshot: the state comes from the
+# `raw_state` aiogram already read for filtering, the data is loaded on first use, and
+# every change is kept locally until flush() writes it back in a single storage call.
+class BufferedFSMContext(FSMContext):
+    def __init__(self, storage: BaseStorage, key: StorageKey, raw_state: Optional[str]):
+        super().__init__(storage=storage, key=key)
+        self._state = raw_state
+        self._state_dirty = False
+        self._data: Dict[str, Any] | None = None
+        self._dirty_fields: set[str] = set()
+        self._data_replaced = False
+
+    async def set_state(self, state: StateType = None) -> None:
+        self._state = state.state if isinstance(state, State) else state
+        self._state_dirty = True
+
+    async def get_state(self) -> Optional[str]:
+        return self._state
+
+    async def set_data(self, data: Mapping[str, Any]) -> None:
+        self._data = dict(data)
+        self._data_replaced = True
+        self._dirty_fields.clear()
+
+    async def get_data(self) -> Dict[str, Any]:
+        return dict(await self._load())
+
+    async def get_value(self, key: str, default: Optional[Any] = None) -> Optional[Any]:
+        return (await self._load()).get(key, default)
+
+    async def update_data(self, data: Optional[Mapping[str, Any]] = None, **kwargs: Any) -> Dict[str, Any]:
+        if data:
+            kwargs.update(data)
+        loaded = await self._load()
+        loaded.update(kwargs)
+        if not self._data_replaced:
+            self._dirty_fields.update(kwargs)
+        return dict(loaded)
+
+    async def flush(self) -> None:
+        # Only a set_data() replaces the stored hash; plain updates write just their fields
+        # so that fields set meanwhile by another update for the same user are kept.
+        dirty = {name: self._data[name] for name in self._dirty_fields}
+        if self._state_dirty and self._data_replaced and hasattr(self.storage, 'set_state_and_data'):
+            await self.storage.set_state_and_data(self.key, self._state, self._data)
+        elif self._state_dirty and dirty and hasattr(self.storage, 'set_state_and_update_data'):
+            await self.storage.set_state_and_update_data(self.key, self._state, dirty)
+        else:
+            if self._state_dirty:
+                await self.storage.set_state(self.key, self._state)
+            if self._data_replaced:
+                await self.storage.set_data(self.key, self._data)
+            elif dirty:
+                await self.storage.update_data(self.key, dirty)
+        self._state_dirty = False
+        self._data_replaced = False
+        self._dirty_fields.clear()
+
+    async def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = await self.storage.get_data(self.key)
+        return self._data
+
+
+class StateBufferMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        state = data.get('state')
+        if state is None:
+            return await handler(event, data)
+
+        buffered = BufferedFSMContext(state.storage, state.key, data.get('raw_state'))
+        data['state'] = buffered
+        try:
+            return await handler(event, data)
+        finally:
+            await buffered.flush()
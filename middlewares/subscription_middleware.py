@@ -6,11 +6,13 @@ from aiogram.exceptions import TelegramBadRequest
 from lexicon.lexicon import LEXICON_RU
 from keyboards.keyboards import create_channel_keyboard
 from config.config import Config
+from services.subscription_cache import SubscriptionChecker
 
 
 class SubscriptionMiddleware(BaseMiddleware):
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, subscriptions: SubscriptionChecker):
         self.config = config
+        self.subscriptions = subscriptions
 
     async def __call__(
         self,
@@ -22,10 +24,9 @@ class SubscriptionMiddleware(BaseMiddleware):
         
         if user and user.id not in self.config.bot.admin_ids:
             bot = data['bot']
+            force = isinstance(event, CallbackQuery) and event.data == 'check_subscription'
             try:
-                chat_member = await bot.get_chat_member(
-                    chat_id=self.config.bot.channel_id, user_id=user.id
-                )
+                is_subscribed = await self.subscriptions.is_subscribed(bot, user.id, force=force)
             except TelegramBadRequest as e:
                 logging.error(f"TelegramBadRequest when checking subscription for user {user.id} in channel {self.config.bot.channel_id}: {e}")
                 if isinstance(event, Message):
@@ -41,7 +42,7 @@ class SubscriptionMiddleware(BaseMiddleware):
                     await event.answer("Произошла непредвиденная ошибка при проверке подписки. Пожалуйста, попробуйте позже.")
                 return
 
-            if chat_member.status not in ['member', 'administrator', 'creator']:
+            if not is_subscribed:
                 if isinstance(event, Message):
                     await event.answer(
                         text=LEXICON_RU['subscription_required'],
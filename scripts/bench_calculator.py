@@ -0,0 +1,56 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import UserCalcConfig, ChinaConfig, KoreaConfig, GeneralConfig
+from services.calculator import COST_FIELDS, CostCalculator
+
+RATES = {'RUB': 1.0, 'EUR': 94.1234, 'USD': 81.7789, 'CNY': 11.3321, 'KRW': 0.05923}
+CALC_CONFIG = UserCalcConfig(
+    china=ChinaConfig(50000, 3000, 2500, 100000, 30000, 40000, 15000),
+    korea=KoreaConfig(440000, 300000, 1200000, 90000, 150000, 20000, 10000),
+    general=GeneralConfig(40000)
+)
+
+
+def make_columns(n: int, seed: int = 1) -> dict[str, list]:
+    rng = random.Random(seed)
+    return {
+        'age': [rng.choice(['year_less_3', 'year_3_5', 'year_more_5']) for _ in range(n)],
+        'cost': [rng.randint(10000, 90000000) for _ in range(n)],
+        'country': [rng.choice(['china', 'korea']) for _ in range(n)],
+        'volume': [rng.choice([0, 1000, 1500, 3000, 3500, rng.randint(800, 6000)]) for _ in range(n)],
+        'engine_type': [rng.choice(['ice', 'electro']) for _ in range(n)],
+        'is_from_kazan': [rng.choice(['yes', 'no']) for _ in range(n)],
+        'power': [rng.choice([0, rng.uniform(10, 600)]) for _ in range(n)]
+    }
+
+
+def main(n: int = 100_000, checked: int = 10_000):
+    calculator = CostCalculator(RATES, CALC_CONFIG)
+    columns = make_columns(n)
+    started = time.perf_counter()
+    result = calculator.calculate_batch(
+        columns['age'], columns['cost'], columns['country'], columns['volume'],
+        columns['engine_type'], columns['is_from_kazan'], columns['power']
+    )
+    print(f"calculate_batch: {n} rows in {time.perf_counter() - started:.3f}s")
+
+    checked = min(n, checked)
+    started = time.perf_counter()
+    mismatches = 0
+    for i in range(checked):
+        costs = calculator.calculate(
+            columns['age'][i], columns['cost'][i], columns['country'][i], columns['volume'][i],
+            columns['engine_type'][i], columns['is_from_kazan'][i], columns['power'][i]
+        )
+        mismatches += sum(getattr(costs, field) != result[field][i] for field in COST_FIELDS)
+    print(f"calculate: {checked} rows in {time.perf_counter() - started:.3f}s, "
+          f"{mismatches} values differ from calculate_batch")
+
+
+if __name__ == '__main__':
+    main()
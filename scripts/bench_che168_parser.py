@@ -0,0 +1,197 @@
+import logging
+import os
+import random
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.parser import parse_che168_requests
+
+
+# Reference: the BeautifulSoup implementation parse_che168_requests replaced, kept
+# verbatim so the benchmark can prove both produce the same result.
+def legacy_parse_che168(html_content: str) -> tuple[dict, str | None]:
+    logging.info("Starting to parse che168.com data using hidden inputs and heuristics.")
+    data = {
+        'car_name': None, 'year': None, 'month': None, 'mileage': None, 'cost': None,
+        'currency': 'CNY', 'volume': None, 'power': None, 'power_unit': 'кВт',
+        'country': 'china', 'engine_type': None
+    }
+    error = None
+    try:
+        soup = BeautifulSoup(html_content, 'lxml')
+        def get_input_val(input_id):
+            input_tag = soup.find('input', {'id': input_id})
+            return input_tag.get('value') if input_tag else None
+        data['car_name'] = get_input_val('car_carname')
+        reg_time = get_input_val('car_firstregtime')
+        if reg_time:
+            try:
+                year, month = reg_time.split('/')
+                data['year'] = int(year)
+                data['month'] = int(month)
+            except (ValueError, IndexError):
+                logging.warning(f"Could not parse car_firstregtime: {reg_time}")
+        mileage_val = get_input_val('car_mileage')
+        if mileage_val:
+            try:
+                data['mileage'] = int(float(mileage_val) * 10000)
+            except (ValueError, TypeError):
+                logging.warning(f"Could not parse car_mileage: {mileage_val}")
+        price_val = get_input_val('car_price')
+        if price_val:
+            try:
+                data['cost'] = int(float(price_val) * 10000)
+            except (ValueError, TypeError):
+                logging.warning(f"Could not parse car_price: {price_val}")
+        text_content = soup.get_text()
+        is_electric = "纯电动" in text_content
+        if is_electric:
+            data['engine_type'] = 'electro'
+            data['volume'] = 0
+            data['power_unit'] = 'кВт'
+            power_text = _legacy_find_spec_value(soup, '最大功率(kW)')
+            if power_text:
+                power_match = re.search(r'(\d+)', power_text)
+                if power_match:
+                    data['power'] = int(power_match.group(1))
+            if not data['power']:
+                power_match = re.search(r'(\d+)\s*kW', text_content, re.IGNORECASE)
+                if power_match:
+                    data['power'] = int(power_match.group(1))
+        else:
+            data['engine_type'] = 'ice'
+            all_lis = soup.find_all('li')
+            for li in all_lis:
+                text = li.text
+                if ('T' in text or 'L' in text) and (re.search(r'V\d', text) or re.search(r'\d{3}', text)):
+                    power_match = re.search(r'(\d{3,})', text)
+                    if power_match:
+                        data['power'] = int(power_match.group(1))
+                        data['power_unit'] = 'л.с.'
+                    volume_match = re.search(r'(\d\.\d)[TL]?', text)
+                    if volume_match:
+                        data['volume'] = int(float(volume_match.group(1)) * 1000)
+                    if data['power'] and data['volume']:
+                        break
+            if not data['volume']:
+                volume_text = _legacy_find_spec_value(soup, '排量(L)')
+                if volume_text:
+                    try:
+                        data['volume'] = 0 if volume_text == '-' else int(float(volume_text) * 1000)
+                    except (ValueError, TypeError):
+                        logging.warning(f"Could not parse volume from {volume_text}")
+    except Exception as e:
+        error = f"Произошла непредвиденная ошибка при парсинге che168.com: {e}"
+        logging.error(error)
+    return data, error
+
+def _legacy_find_spec_value(soup: BeautifulSoup, label_text: str) -> str | None:
+    try:
+        label_tag = soup.find(lambda tag: tag.name and label_text in tag.text)
+        if not label_tag:
+            return None
+        
+        parent_li = label_tag.find_parent('li')
+        if parent_li:
+            value_tag = parent_li.find('p')
+            if value_tag:
+                return value_tag.text.strip()
+
+        parent_td = label_tag.find_parent('td')
+        if parent_td:
+            next_td = parent_td.find_next_sibling('td')
+            if next_td:
+                return next_td.text.strip()
+        
+        parent = label_tag.parent
+        value_tag = parent.find(['p', 'span', 'div'], class_=lambda x: x != 'label')
+        if value_tag:
+            return value_tag.text.strip()
+
+    except Exception:
+        return None
+    return None
+
+
+SPEC_FILLER = ['变速箱', '驱动方式', '车身结构', '座位数', '排放标准', '燃油标号', '车门数', '颜色', '内饰', '保养']
+
+
+def make_page(rng: random.Random, filler: int) -> str:
+    electric = rng.random() < 0.3
+    year, month = rng.randint(2012, 2024), rng.randint(1, 12)
+    inputs = [
+        f'<input type="hidden" id="car_carname" value="{rng.choice(["宝马X5", "奥迪A6L", "比亚迪汉EV", ""])}">',
+        f'<input type="hidden" id="car_firstregtime" value="{rng.choice([f"{year}/{month}", f"{year}", ""])}">',
+        f'<input type="hidden" id="car_mileage" value="{rng.choice([round(rng.uniform(0.1, 20), 2), "x", ""])}">',
+        f'<input type="hidden" id="car_price" value="{round(rng.uniform(3, 90), 2)}">',
+    ]
+    rng.shuffle(inputs)
+    engine = rng.choice(['2.0T 245马力 L4', '1.5L 113马力', '3.0T V6', '电动机', '1.8T'])
+    spec_items = [
+        f'<li><span class="label">{rng.choice(SPEC_FILLER)}</span><p> {rng.randint(1, 999)} </p></li>'
+        for _ in range(filler)
+    ]
+    spec_items.insert(rng.randint(0, len(spec_items)), f'<li>\n  <span>{engine}</span>\n  <!-- 发动机 -->\n</li>')
+    if electric:
+        spec_items.insert(rng.randint(0, len(spec_items)),
+                          f'<li><span class="label">最大功率(kW)</span><p>{rng.randint(80, 500)}</p></li>')
+    elif rng.random() < 0.5:
+        spec_items.append(f'<li><span class="label">排量(L)</span><p>{rng.choice(["1.5", "2.0", "-", "未知"])}</p></li>')
+    first_value = rng.choice([
+        '<div class="label">标签</div>', '<span class="label title">车况</span>',
+        '<p>  \n </p>', f'<div class="price"> {rng.randint(1, 99)}万 </div>'
+    ])
+    script = rng.choice(['', '<script>var spec = {"排量(L)": "2.0", "label": "最大功率(kW)"};</script>'])
+    return (
+        '<!DOCTYPE html><html><head><meta charset="gb2312"><title>二手车</title>'
+        f'<style>.label {{ color: red; }}</style>{script}</head><body>'
+        f'{first_value}{"".join(inputs)}'
+        f'<div class="fuel">{"纯电动" if electric else "汽油"}</div>'
+        f'<ul class="basic-item-ul">{"".join(spec_items)}</ul>'
+        f'<table><tr><td>排量(L)</td><td>{rng.choice(["2.0", "-"])}</td></tr></table>'
+        f'<pre>  {rng.randint(100, 300)} kW  </pre><template><p>纯电动 999kW</p></template>'
+        '</body></html>'
+    )
+
+
+def load_pages(paths: list[str]) -> list[str]:
+    if paths:
+        pages = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            pages.append(raw.decode('utf-8', errors='replace') if b'charset=utf-8' in raw.lower()
+                         else raw.decode('gb18030', errors='replace'))
+        return pages
+    rng = random.Random(168)
+    return [make_page(rng, rng.choice([5, 50, 400])) for _ in range(300)]
+
+
+def timed(parse, pages: list[str]) -> tuple[list, float]:
+    started = time.perf_counter()
+    results = [parse(page) for page in pages]
+    return results, time.perf_counter() - started
+
+
+# Usage: python scripts/bench_che168_parser.py [saved_page.html ...]
+# Without arguments a set of generated che168-like pages is used.
+def main():
+    logging.disable(logging.CRITICAL)
+    pages = load_pages(sys.argv[1:])
+    legacy, legacy_time = timed(legacy_parse_che168, pages)
+    current, current_time = timed(parse_che168_requests, pages)
+    mismatches = [i for i, (a, b) in enumerate(zip(legacy, current)) if a != b]
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / 1e6:.1f} MB")
+    print(f"BeautifulSoup: {legacy_time:.3f}s, lxml: {current_time:.3f}s ({legacy_time / current_time:.1f}x faster)")
+    print(f"{len(mismatches)} pages parse differently")
+    for i in mismatches[:5]:
+        print(f"  page {i}: {legacy[i]} != {current[i]}")
+
+
+if __name__ == '__main__':
+    main()
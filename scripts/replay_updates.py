@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+import aiohttp
+from environs import Env
+
+
+# Stand-in for Telegram when the bot runs with BOT_MODE=webhook and no WEBHOOK_BASE_URL:
+# POSTs recorded updates (one JSON object per line) with the secret header and, like
+# Telegram, redelivers an update after a 503 until the server accepts it.
+async def post_update(session: aiohttp.ClientSession, url: str, headers: dict, update: dict,
+                      statuses: Counter, max_attempts: int):
+    for _ in range(max_attempts):
+        async with session.post(url, json=update, headers=headers) as response:
+            statuses[response.status] += 1
+            if response.status != 503:
+                return
+            retry_after = float(response.headers.get('Retry-After', 1))
+        await asyncio.sleep(retry_after)
+
+
+async def replay(path: str, url: str, secret: str, concurrency: int, max_attempts: int):
+    with open(path, 'r', encoding='utf-8') as f:
+        updates = [json.loads(line) for line in f if line.strip()]
+    headers = {'X-Telegram-Bot-Api-Secret-Token': secret} if secret else {}
+    statuses: Counter = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(update: dict):
+        async with semaphore:
+            await post_update(session, url, headers, update, statuses, max_attempts)
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(send(update) for update in updates))
+    print(f"{len(updates)} updates posted to {url} in {time.perf_counter() - started:.2f}s, "
+          f"responses: {dict(sorted(statuses.items()))}")
+
+
+def main():
+    env = Env()
+    env.read_env()
+    parser = argparse.ArgumentParser(description='Replay recorded Telegram updates against the webhook server')
+    parser.add_argument('updates', help='JSONL file with one Update object per line')
+    parser.add_argument('--url', default=f"http://127.0.0.1:{env.int('WEBHOOK_PORT', 8080)}"
+                                         f"{env('WEBHOOK_PATH', '/webhook')}")
+    parser.add_argument('--secret', default=env('WEBHOOK_SECRET', ''))
+    parser.add_argument('--concurrency', type=int, default=40)
+    parser.add_argument('--max-attempts', type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(replay(args.updates, args.url, args.secret, args.concurrency, args.max_attempts))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+
+from config.config import AdminNotifySettings
+from services.rate_limit import TokenBucket
+
+MAX_DETAILS = 5
+MAX_SEND_ATTEMPTS = 3
+
+
+@dataclass
+class _Group:
+    text: str
+    exclude: int | None
+    due: float
+    count: int = 0
+    details: list[str] = field(default_factory=list)
+
+    def add(self, detail: str | None):
+        self.count += 1
+        if detail and len(self.details) < MAX_DETAILS and detail not in self.details:
+            self.details.append(detail)
+
+    def render(self) -> str:
+        lines = [self.text, *self.details]
+        if self.count > 1:
+            lines.append(f"Повторилось {self.count} раз(а)")
+        return "\n".join(lines)
+
+
+# Background fan-out of messages to every admin. notify() only records the message and
+# returns; identical texts arriving within `group_window` seconds are sent once with a
+# repeat count, and sends go out concurrently under a per-chat and a global rate limit.
+class AdminNotifier:
+    def __init__(self, bot: Bot, admin_ids: list[int], settings: AdminNotifySettings):
+        self.bot = bot
+        self.admin_ids = admin_ids
+        self.settings = settings
+        self.dropped = 0
+        self._groups: dict[tuple[str, int | None], _Group] = {}
+        self._queue: asyncio.Queue[tuple[str, int | None]] = asyncio.Queue(settings.queue_size)
+        self._global_limit = TokenBucket(settings.global_rate)
+        self._chat_limits: dict[int, TokenBucket] = {}
+        self._task: asyncio.Task | None = None
+        self._draining = asyncio.Event()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._draining.set()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.settings.drain_timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Dropping {self._queue.qsize()} admin notifications on shutdown")
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def notify(self, text: str, detail: str | None = None, exclude: int | None = None):
+        key = (text, exclude)
+        group = self._groups.get(key)
+        if group is None:
+            if self._queue.full():
+                self.dropped += 1
+                logging.debug(f"Admin notification queue is full, dropped: {text}")
+                return
+            group = _Group(text, exclude, time.monotonic() + self.settings.group_window)
+            self._groups[key] = group
+            self._queue.put_nowait(key)
+        group.add(detail)
+
+    async def for_each_admin(self, call: Callable[[int], Awaitable], exclude: int | None = None):
+        await asyncio.gather(*(
+            self._call_limited(chat_id, call) for chat_id in self.admin_ids if chat_id != exclude
+        ))
+
+    async def _run(self):
+        while True:
+            key = await self._queue.get()
+            try:
+                group = self._groups[key]
+                delay = group.due - time.monotonic()
+                if delay > 0:
+                    # Shutdown cuts the grouping window short instead of losing the message.
+                    try:
+                        await asyncio.wait_for(self._draining.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                del self._groups[key]
+                text = group.render()
+                await self.for_each_admin(lambda chat_id: self.bot.send_message(chat_id, text), group.exclude)
+            except Exception as e:
+                logging.error(f"Failed to deliver admin notification: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _call_limited(self, chat_id: int, call: Callable[[int], Awaitable]):
+        chat_limit = self._chat_limits.get(chat_id)
+        if chat_limit is None:
+            chat_limit = self._chat_limits[chat_id] = TokenBucket(self.settings.per_chat_rate)
+        for attempt in range(1, MAX_SEND_ATTEMPTS + 1):
+            await chat_limit.acquire()
+            await self._global_limit.acquire()
+            try:
+                await call(chat_id)
+                return
+            except TelegramRetryAfter as e:
+                if attempt == MAX_SEND_ATTEMPTS:
+                    logging.warning(f"Giving up on admin {chat_id} after flood control: {e}")
+                    return
+                await asyncio.sleep(e.retry_after)
+            except TelegramAPIError as e:
+                logging.warning(f"Could not reach admin {chat_id}: {e}")
+                return
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, Route, async_playwright
+
+from config.config import BrowserSettings
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36'
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font'}
+BLOCKED_HOSTS = (
+    'doubleclick.net', 'googlesyndication.com', 'googleadservices.com', 'google-analytics.com',
+    'googletagmanager.com', 'facebook.net', 'facebook.com', 'criteo.com', 'criteo.net',
+    'adnxs.com', 'taboola.com', 'outbrain.com', 'daumcdn.net', 'kakao.com', 'naver.net'
+)
+
+
+async def _block_heavy_requests(route: Route):
+    request = route.request
+    host = request.url.split('/')[2] if '://' in request.url else ''
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or host.endswith(BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+@dataclass
+class _Slot:
+    context: BrowserContext | None = None
+    page: Page | None = None
+    uses: int = 0
+
+
+# One long-lived headless Chromium with a fixed number of warm contexts. Each context
+# keeps a single page that is reused for `max_page_uses` navigations and then replaced,
+# so concurrency and memory stay bounded no matter how many links users send.
+class BrowserPool:
+    def __init__(self, settings: BrowserSettings):
+        self.settings = settings
+        self._playwright: Playwright | None = None
+        self._browser: Browser | None = None
+        self._slots: asyncio.Queue[_Slot] | None = None
+        self._start_lock = asyncio.Lock()
+
+    async def start(self):
+        async with self._start_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            await self._shutdown()
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=True,
+                args=['--disable-dev-shm-usage', '--disable-gpu', '--no-first-run', '--mute-audio']
+            )
+            self._slots = asyncio.Queue()
+            for _ in range(self.settings.contexts):
+                self._slots.put_nowait(_Slot())
+            logging.info(f"Browser pool started with {self.settings.contexts} contexts")
+
+    async def stop(self):
+        async with self._start_lock:
+            await self._shutdown()
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        if self._browser is None or not self._browser.is_connected():
+            await self.start()
+        slots = self._slots
+        slot = await slots.get()
+        try:
+            if slot.page is None or slot.page.is_closed() or slot.uses >= self.settings.max_page_uses:
+                await self._renew(slot)
+            slot.uses += 1
+            try:
+                yield slot.page
+            except Exception:
+                # A failed navigation can leave the page mid-load; start the next user clean.
+                await self._release(slot)
+                raise
+        finally:
+            slots.put_nowait(slot)
+
+    async def _renew(self, slot: _Slot):
+        await self._release(slot)
+        slot.context = await self._browser.new_context(user_agent=USER_AGENT)
+        slot.context.set_default_navigation_timeout(self.settings.navigation_timeout * 1000)
+        await slot.context.route('**/*', _block_heavy_requests)
+        slot.page = await slot.context.new_page()
+
+    @staticmethod
+    async def _release(slot: _Slot):
+        if slot.context is not None:
+            try:
+                await slot.context.close()
+            except Exception as e:
+                logging.debug(f"Error closing browser context: {e}")
+        slot.context, slot.page, slot.uses = None, None, 0
+
+    async def _shutdown(self):
+        if self._slots is not None:
+            while not self._slots.empty():
+                await self._release(self._slots.get_nowait())
+            self._slots = None
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logging.debug(f"Error closing browser: {e}")
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
@@ -0,0 +1,127 @@
+import asyncio
+import csv
+import html
+import io
+import logging
+import re
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from config.config import UserCalcConfig
+from services.calculator import calculate_cost, get_age_category_val
+from services.parser import validate_and_normalize_url
+
+URL_RE = re.compile(r'https?://[^\s,;"\'<>]+')
+CURRENCY_SYMBOLS = {'CNY': '¥', 'KRW': '₩'}
+TABLE_NAME_WIDTH = 24
+
+ListingLoader = Callable[[str], Awaitable[tuple[dict | None, str | None]]]
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+@dataclass
+class BulkRow:
+    url: str
+    car_name: str | None = None
+    year: int | None = None
+    cost: int | None = None
+    currency: str | None = None
+    total_rub: float | None = None
+    error: str | None = None
+
+
+def extract_listing_urls(text: str) -> list[str]:
+    urls = []
+    for match in URL_RE.findall(text):
+        url, error = validate_and_normalize_url(match)
+        if not error and url not in urls:
+            urls.append(url)
+    return urls
+
+
+# Single-link flow rules applied without questions: totals are for delivery to Kazan,
+# and electric cars are left to the manager just as in process_url_sent.
+async def _price_listing(url: str, load: ListingLoader, calc_config: UserCalcConfig) -> BulkRow:
+    row = BulkRow(url)
+    try:
+        car_data, error = await load(url)
+    except Exception as e:
+        logging.warning(f"Bulk pricing failed to load {url}: {e}")
+        row.error = 'ошибка загрузки'
+        return row
+    if error or not car_data:
+        row.error = error or 'не удалось разобрать страницу'
+        return row
+    if car_data.get('special_message'):
+        row.error = car_data['special_message']
+        return row
+
+    row.car_name = car_data.get('car_name')
+    row.year = car_data.get('year')
+    row.cost = car_data.get('cost')
+    row.currency = car_data.get('currency')
+    if car_data.get('engine_type') == 'electro' or (car_data.get('power') and not car_data.get('volume')):
+        row.error = 'электромобиль — расчёт у менеджера'
+    elif row.year is None or row.cost is None:
+        row.error = 'нет года или цены'
+    elif car_data.get('volume') is None:
+        row.error = 'нет объёма двигателя'
+    else:
+        costs = await calculate_cost(
+            get_age_category_val(row.year, car_data.get('month') or 1), row.cost, car_data['country'],
+            car_data['volume'], calc_config, car_data.get('engine_type') or 'ice', 'yes', car_data.get('power') or 0
+        )
+        row.total_rub = costs['total_cost_rub']
+    return row
+
+
+async def price_listings(urls: list[str], load: ListingLoader, calc_config: UserCalcConfig, concurrency: int,
+                         on_progress: ProgressCallback | None = None) -> list[BulkRow]:
+    semaphore = asyncio.Semaphore(concurrency)
+    done = 0
+
+    async def price(url: str) -> BulkRow:
+        nonlocal done
+        async with semaphore:
+            row = await _price_listing(url, load, calc_config)
+        done += 1
+        if on_progress is not None:
+            await on_progress(done, len(urls))
+        return row
+
+    return await asyncio.gather(*(price(url) for url in urls))
+
+
+def _format_number(n) -> str:
+    return f"{round(n):,}".replace(",", " ")
+
+
+def _short_name(name: str | None) -> str:
+    name = name or '—'
+    return name if len(name) <= TABLE_NAME_WIDTH else name[:TABLE_NAME_WIDTH - 1] + '…'
+
+
+def format_bulk_table(rows: list[BulkRow]) -> str:
+    lines = []
+    for i, row in enumerate(rows, 1):
+        if row.error:
+            lines.append(f"{i:>2}. {_short_name(row.car_name)}\n    ⚠️ {row.error}")
+            continue
+        price = f"{_format_number(row.cost)} {CURRENCY_SYMBOLS.get(row.currency, row.currency or '')}"
+        lines.append(
+            f"{i:>2}. {_short_name(row.car_name)}\n"
+            f"    {row.year} · {price} → {_format_number(row.total_rub)} ₽"
+        )
+    return f"<pre>{html.escape(chr(10).join(lines))}</pre>"
+
+
+def format_bulk_csv(rows: list[BulkRow]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    writer.writerow(['№', 'Ссылка', 'Автомобиль', 'Год', 'Цена', 'Валюта', 'Итого, руб. (Казань)', 'Ошибка'])
+    for i, row in enumerate(rows, 1):
+        writer.writerow([
+            i, row.url, row.car_name or '', row.year or '', row.cost or '', row.currency or '',
+            round(row.total_rub) if row.total_rub is not None else '', row.error or ''
+        ])
+    return buffer.getvalue().encode('utf-8-sig')
@@ -1,36 +1,256 @@
-import aiohttp
+import asyncio
+import logging
+import os
 import xml.etree.ElementTree as ET
-from datetime import date
+from dataclasses import dataclass, replace
+from datetime import date, datetime, time, timedelta
+
+import aiohttp
+
+from config.config import get_project_root
+from services.http_client import HttpClient
+from services.rates_store import RatesStore
+
+CBR_DAILY_URL = "https://www.cbr.ru/scripts/XML_daily.asp"
+CBR_DYNAMIC_URL = "https://www.cbr.ru/scripts/XML_dynamic.asp"
 
-rates_cache = {
-    'timestamp': None,
-    'rates': {}
+# CBR internal ids used by the date-range API for the currencies the calculator needs.
+CBR_VALUTE_IDS = {
+    'EUR': 'R01239',
+    'USD': 'R01235',
+    'CNY': 'R01375',
+    'KRW': 'R01815'
 }
 
+# Long enough to reach the previous table across the New Year holidays.
+BACKFILL_PADDING = timedelta(days=14)
+
+
+@dataclass(frozen=True)
+class RatesSnapshot:
+    rates: dict[str, float]
+    fetched_for: date
+    stale_since: datetime | None = None
+
+    @property
+    def is_stale(self) -> bool:
+        return self.stale_since is not None
+
+
+def _parse_cbr_date(value: str) -> date:
+    return datetime.strptime(value, '%d.%m.%Y').date()
+
+
+async def get_cbr_rates_async(session: aiohttp.ClientSession,
+                              on: date | None = None) -> tuple[date, dict[str, float]]:
+    on = on or date.today()
+    url = f"{CBR_DAILY_URL}?date_req={on.strftime('%d/%m/%Y')}"
+    async with session.get(url) as response:
+        response.raise_for_status()
+        content = await response.read()
+        root = ET.fromstring(content)
+
+        rates = {'RUB': 1.0}
+        for valute in root.findall('Valute'):
+            char_code = valute.find('CharCode').text
+            value = valute.find('Value').text.replace(',', '.')
+            nominal = valute.find('Nominal').text.replace(',', '.')
+            rates[char_code] = float(value) / float(nominal)
+        table_date = _parse_cbr_date(root.get('Date')) if root.get('Date') else on
+        return table_date, rates
+
+
+async def get_cbr_dynamic_rates_async(session: aiohttp.ClientSession, start: date, end: date,
+                                      valute_id: str) -> list[tuple[date, float]]:
+    url = (f"{CBR_DYNAMIC_URL}?date_req1={start.strftime('%d/%m/%Y')}"
+           f"&date_req2={end.strftime('%d/%m/%Y')}&VAL_NM_RQ={valute_id}")
+    async with session.get(url) as response:
+        response.raise_for_status()
+        root = ET.fromstring(await response.read())
+
+        records = []
+        for record in root.findall('Record'):
+            value = record.find('Value').text.replace(',', '.')
+            nominal = record.find('Nominal').text.replace(',', '.')
+            records.append((_parse_cbr_date(record.get('Date')), float(value) / float(nominal)))
+        return records
+
+
+# Concurrent callers share one in-flight fetch per date. Once a table is loaded it is
+# served immediately; a date rollover only schedules a background refresh, and if CBR
+# is down the last good table keeps being served with `stale_since` set. Every table is
+# also written to the on-disk store, which seeds the provider at startup and answers
+# lookups for past dates.
+class RatesProvider:
+    def __init__(self, store: RatesStore, refresh_before: timedelta = timedelta(minutes=5),
+                 retry_interval: timedelta = timedelta(minutes=1)):
+        self._store = store
+        self._refresh_before = refresh_before
+        self._retry_interval = retry_interval
+        self._current: RatesSnapshot | None = None
+        self._upcoming: RatesSnapshot | None = None
+        self._inflight: dict[date, asyncio.Task] = {}
+        self._last_attempt: datetime | None = None
+        self._scheduler: asyncio.Task | None = None
+        self._http: HttpClient | None = None
+        self._backfill_lock = asyncio.Lock()
+        self._backfill_task: asyncio.Task | None = None
+
+    async def get(self) -> RatesSnapshot:
+        today = date.today()
+        if self._upcoming and self._upcoming.fetched_for <= today:
+            self._current, self._upcoming = self._upcoming, None
+
+        current = self._current
+        if current is None:
+            return await self.refresh(today)
+
+        if current.fetched_for != today or current.is_stale:
+            self._refresh_in_background(today)
+        return current
+
+    async def refresh(self, on: date | None = None) -> RatesSnapshot:
+        on = on or date.today()
+        task = self._inflight.get(on)
+        if task is None:
+            task = asyncio.create_task(self._fetch(on))
+            self._inflight[on] = task
+            task.add_done_callback(lambda _: self._inflight.pop(on, None))
+        return await asyncio.shield(task)
+
+    async def get_on(self, on: date) -> dict[str, float]:
+        if on >= date.today():
+            return (await self.get()).rates
+        if await self._store.missing_days(on, on):
+            await self.backfill(on - BACKFILL_PADDING, on)
+        rates = await self._store.get(on)
+        if rates is None:
+            raise LookupError(f"No CBR rates stored for {on}")
+        return {'RUB': 1.0, **rates}
+
+    async def backfill(self, start: date, end: date):
+        async with self._backfill_lock:
+            missing = await self._store.missing_days(start, end)
+            if not missing:
+                return
+            start, end = missing[0], missing[-1]
+            session = self._http.session
+            codes = list(CBR_VALUTE_IDS)
+            results = await asyncio.gather(*(
+                get_cbr_dynamic_rates_async(session, start - BACKFILL_PADDING, end, CBR_VALUTE_IDS[code])
+                for code in codes
+            ))
+            rows = [(day, code, rate) for code, records in zip(codes, results) for day, rate in records]
+            await self._store.put_range(rows, start, end)
+            logging.info(f"Backfilled CBR rates for {start}..{end}: {len(rows)} records")
+
+    def start(self, http: HttpClient):
+        self._http = http
+        self._store.open()
+        stored = self._store.latest()
+        if stored and self._current is None:
+            covered_until, rates = stored
+            today = date.today()
+            # A table that stopped covering some earlier day has been out of date since
+            # the following midnight, restart or not.
+            stale_since = None
+            if covered_until < today:
+                stale_since = datetime.combine(covered_until + timedelta(days=1), time())
+            self._current = RatesSnapshot(rates={'RUB': 1.0, **rates}, fetched_for=covered_until,
+                                          stale_since=stale_since)
+            logging.info(f"Loaded stored CBR rates for {covered_until}"
+                         + (f" (stale since {stale_since})" if stale_since else ""))
+            yesterday = today - timedelta(days=1)
+            if covered_until < yesterday:
+                self._backfill_task = asyncio.create_task(
+                    self._backfill_quietly(covered_until + timedelta(days=1), yesterday)
+                )
+        if self._scheduler is None:
+            self._scheduler = asyncio.create_task(self._run_scheduler())
+
+    async def stop(self):
+        tasks = [t for t in (self._scheduler, self._backfill_task, *self._inflight.values()) if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._scheduler = None
+        self._backfill_task = None
+        self._store.close()
+
+    async def _backfill_quietly(self, start: date, end: date):
+        try:
+            await self.backfill(start, end)
+        except Exception as e:
+            logging.warning(f"CBR rates backfill for {start}..{end} failed: {e}")
+
+    def _refresh_in_background(self, on: date):
+        if on in self._inflight:
+            return
+        now = datetime.now()
+        if self._last_attempt and now - self._last_attempt < self._retry_interval:
+            return
+        self._inflight[on] = task = asyncio.create_task(self._fetch(on))
+        task.add_done_callback(lambda _: self._inflight.pop(on, None))
+
+    async def _fetch(self, on: date) -> RatesSnapshot:
+        self._last_attempt = datetime.now()
+        try:
+            table_date, rates = await get_cbr_rates_async(self._http.session, on)
+        except Exception as e:
+            current = self._current
+            if current is None:
+                raise
+            if on > date.today():
+                logging.warning(f"Could not prefetch CBR rates for {on}: {e}")
+                return current
+            if not current.is_stale:
+                current = self._current = replace(current, stale_since=datetime.now())
+            logging.warning(f"Could not refresh CBR rates for {on}, serving table for "
+                            f"{current.fetched_for} (stale since {current.stale_since}): {e}")
+            return current
+
+        snapshot = RatesSnapshot(rates=rates, fetched_for=on)
+        if on > date.today() and table_date <= date.today():
+            # Until CBR publishes tomorrow's table it answers with today's one;
+            # leave the rollover to the regular background refresh in that case.
+            return snapshot
+
+        table_date = min(table_date, on)
+        try:
+            await self._store.put_table(table_date, rates, covered_until=on)
+        except Exception as e:
+            logging.warning(f"Could not store CBR rates for {table_date}: {e}")
+
+        if on > date.today():
+            self._upcoming = snapshot
+        else:
+            self._current = snapshot
+        logging.info(f"CBR rates loaded for {on} (table of {table_date})")
+        return snapshot
+
+    async def _run_scheduler(self):
+        while True:
+            now = datetime.now()
+            tomorrow = now.date() + timedelta(days=1)
+            next_run = datetime.combine(tomorrow, time()) - self._refresh_before
+            if next_run > now:
+                await asyncio.sleep((next_run - now).total_seconds())
+            try:
+                await self.refresh(tomorrow)
+            except Exception as e:
+                logging.warning(f"Scheduled CBR rates refresh for {tomorrow} failed: {e}")
+            # Do not spin if the clock is still before midnight after the fetch.
+            await asyncio.sleep(max(0.0, (datetime.combine(tomorrow, time()) - datetime.now()).total_seconds()))
+
+
+rates_provider = RatesProvider(RatesStore(os.path.join(get_project_root(), 'data', 'rates.sqlite3')))
+
+
+async def get_rates_snapshot() -> RatesSnapshot:
+    return await rates_provider.get()
+
 
-async def get_cbr_rates_async() -> dict[str, float]:
-    url = f"https://www.cbr.ru/scripts/XML_daily.asp?date_req={date.today().strftime('%d/%m/%Y')}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            response.raise_for_status()
-            content = await response.read()
-            root = ET.fromstring(content)
-
-            rates = {'RUB': 1.0}
-            for valute in root.findall('Valute'):
-                char_code = valute.find('CharCode').text
-                value = valute.find('Value').text.replace(',', '.')
-                nominal = valute.find('Nominal').text.replace(',', '.')
-                rates[char_code] = float(value) / float(nominal)
-            return rates
-
-
-async def get_rates() -> dict[str, float]:
-    today = date.today()
-    if rates_cache['timestamp'] == today and rates_cache['rates']:
-        return rates_cache['rates']
-
-    rates = await get_cbr_rates_async()
-    rates_cache['timestamp'] = today
-    rates_cache['rates'] = rates
-    return rates
\ No newline at end of file
+async def get_rates(on: date | None = None) -> dict[str, float]:
+    if on is not None:
+        return await rates_provider.get_on(on)
+    return (await rates_provider.get()).rates
@@ -1,60 +1,91 @@
+import hashlib
+import json
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+
+import numpy as np
+
 from services.cache import get_rates
 from config.config import UserCalcConfig
 from config.rules_config import (
+    BracketTable,
     CUSTOMS_PAYMENTS_RATES,
     RECYCLING_FEE_RATES,
     CUSTOMS_CLEARANCE_FEES,
     COUNTRY_CURRENCY_MAP,
+    EXCISE_TAX_RATES,
+    KW_PER_HP,
 )
 
 
-def _get_rate_from_table(value, table):
-    for limit, rate in table:
-        if value <= limit:
-            return rate
-    return table[-1][1]
+AGE_CATEGORIES = {
+    'year_less_3': 'up_to_3',
+    'year_3_5': '3_to_5',
+    'year_more_5': '5_to_7'
+}
 
 
-def _get_row_from_table(value, table):
-    for row in table:
-        if value <= row[0]:
-            return row
-    return table[-1]
+def get_age_category_val(car_year: int, car_month: int = 1) -> str:
+    now = datetime.now()
+    current_year = now.year
+    current_month = now.month
+    
+    age_in_months = (current_year - car_year) * 12 + (current_month - car_month)
+    
+    if age_in_months < 36:
+        return "year_less_3"
+    elif 36 <= age_in_months <= 60:
+        return "year_3_5"
+    else:
+        return "year_more_5"
+
+
+
+@dataclass(frozen=True, slots=True)
+class CostBreakdown:
+    car_cost: float
+    dealer_commission: float
+    customs_payments: float
+    customs_clearance: float
+    recycling_fee: float
+    china_documents_delivery: float
+    logistics_cost: float
+    lab_svh_cost: float
+    korea_inland_transport: float
+    korea_port_transport_loading: float
+    vladivostok_expenses: float
+    logistics_vladivostok_kazan: float
+    car_preparation: float
+    other_expenses: float
+    excise_tax: float
+    delivery_to_region_cost: float
+    vat: float
+    total_cost: float
+    total_cost_rub: float
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in COST_FIELDS}
+
+
+COST_FIELDS = tuple(field.name for field in fields(CostBreakdown))
+
+COST_DTYPE = np.dtype([(field, np.float64) for field in COST_FIELDS])
 
 
 def _calculate_excise_tax(power_kw: float) -> float:
     if power_kw == 0:
         return 0
 
-    power_hp = power_kw / 0.7355
-
-    if power_hp <= 90:
-        return 0
-    elif 90 < power_hp <= 150:
-        return power_hp * 61
-    elif 150 < power_hp <= 200:
-        return power_hp * 574
-    elif 200 < power_hp <= 300:
-        return power_hp * 955
-    elif 300 < power_hp <= 400:
-        return power_hp * 1628
-    elif 400 < power_hp <= 500:
-        return power_hp * 1685
-    else:  # power_hp > 500
-        return power_hp * 1740
+    power_hp = power_kw / KW_PER_HP
+    rate = EXCISE_TAX_RATES.lookup(power_hp)
+    return power_hp * rate if rate else 0
 
 
 def _calculate_customs_payments(age, cost_eur, volume, engine_type):
     if engine_type == 'electro':
         return cost_eur * 0.15
 
-    age_category = ''
-    if age == 'year_less_3':
-        age_category = 'up_to_3'
-    elif age == 'year_3_5':
-        age_category = '3_to_5'
-    elif age == 'year_more_5':
-        age_category = '5_to_7'
+    age_category = AGE_CATEGORIES.get(age, '')
 
     rates = CUSTOMS_PAYMENTS_RATES.get(age_category, {})
 
@@ -63,11 +94,11 @@ def _calculate_customs_payments(age, cost_eur, volume, engine_type):
 
     if 'by_cost' in rates:
         
-        rate_info = _get_row_from_table(cost_eur, rates['by_cost'])
-        return max(cost_eur * rate_info[1], rate_info[2] * volume)
+        cost_share, min_rate_per_cc = rates['by_cost'].lookup(cost_eur)
+        return max(cost_eur * cost_share, min_rate_per_cc * volume)
 
     elif 'by_volume' in rates:
-        rate_eur = _get_rate_from_table(volume, rates['by_volume'])
+        rate_eur = rates['by_volume'].lookup(volume)
         return rate_eur * volume
     return 0
 
@@ -84,105 +115,242 @@ def _calculate_recycling_fee(age, volume, engine_type):
     if fee_category == 'electric_hybrid':
         return rates[age_category]
 
-    return _get_rate_from_table(volume, rates[age_category])
+    return rates[age_category].lookup(volume)
 
 
 def _calculate_customs_clearance(cost_rub):
-    return _get_rate_from_table(cost_rub, CUSTOMS_CLEARANCE_FEES)
+    return CUSTOMS_CLEARANCE_FEES.lookup(cost_rub)
+
+
+def _lookup_array(table: BracketTable, values: np.ndarray) -> np.ndarray:
+    index = np.searchsorted(np.asarray(table.limits), values, side='left')
+    np.minimum(index, len(table.limits) - 1, out=index)
+    return np.asarray(table.values)[index]
+
+
+def _column(values, n: int, dtype=None) -> np.ndarray:
+    return np.broadcast_to(np.asarray(values, dtype=dtype), (n,))
+
+
+# Pure arithmetic over an explicit rates table and calc config: no I/O and no event
+# loop, so it can run in executors, batch jobs and benchmarks as is.
+class CostCalculator:
+    def __init__(self, rates: dict[str, float], calc_config: UserCalcConfig):
+        self.rates = rates
+        self.calc_config = calc_config
+        self.eur_rate = rates.get('EUR', 90.0)
+        self.usd_rate = rates.get('USD', 90.0)
+        self.cny_rate = rates.get('CNY', 12.0)
+        self.krw_rate = rates.get('KRW', 0.07)
+
+    def calculate(self, age: str, cost: int, country: str, volume: int, engine_type: str = 'ice',
+                  is_from_kazan: str | None = None, power: float = 0) -> CostBreakdown:
+        rates = self.rates
+        calc_config = self.calc_config
+        currency = COUNTRY_CURRENCY_MAP.get(country)
+
+        cost_rub = cost * rates.get(currency, 1.0)
+        eur_rate = self.eur_rate
+        usd_rate = self.usd_rate
+        cny_rate = self.cny_rate
+        krw_rate = self.krw_rate
+        cost_eur = cost_rub / eur_rate
+
+        customs_payments_eur = _calculate_customs_payments(age, cost_eur, volume, engine_type)
+        customs_payments = customs_payments_eur * eur_rate
+
+        recycling_fee = _calculate_recycling_fee(age, volume, engine_type)
+        customs_clearance = _calculate_customs_clearance(cost_rub)
+
+        excise_tax = 0
+        if engine_type == 'electro':
+            excise_tax = _calculate_excise_tax(power)
+
+        delivery_to_region_cost = 0
+        dealer_commission = 0
+        china_documents_delivery = 0
+        logistics_cost = 0
+        lab_svh_cost = 0
+        korea_inland_transport = 0
+        korea_port_transport_loading = 0
+        vladivostok_expenses = 0
+        logistics_vladivostok_kazan = 0
+        car_preparation = 0
+        other_expenses = 0
+
+        if country == 'china':
+            china_config = calc_config.china
+            dealer_commission = china_config.dealer_commission
+            china_documents_delivery = china_config.documents_delivery_cny * cny_rate
+            logistics_cost = china_config.logistics_kazan_usd * usd_rate + china_config.logistics_kazan_rub
+            other_expenses = china_config.other_expenses_rub
+            if is_from_kazan == 'no':
+                delivery_to_region_cost = china_config.lab_svh_not_kazan_rub
+            else:
+                lab_svh_cost = china_config.lab_svh_kazan_rub
+
+        elif country == 'korea':
+            korea_config = calc_config.korea
+            dealer_commission = korea_config.dealer_commission_krw * krw_rate
+            korea_inland_transport = korea_config.inland_transport_krw * krw_rate
+            korea_port_transport_loading = korea_config.port_transport_loading_krw * krw_rate
+            vladivostok_expenses = korea_config.vladivostok_expenses_rub
+            logistics_vladivostok_kazan = korea_config.logistics_vladivostok_kazan_rub
+            car_preparation = korea_config.car_preparation_rub
+            other_expenses = korea_config.other_expenses_rub
+
+            if is_from_kazan == 'no':
+                delivery_to_region_cost = calc_config.general.delivery_to_region_rub
+
+        total_cost_rub = (
+                cost_rub + dealer_commission + customs_payments + recycling_fee +
+                customs_clearance + china_documents_delivery + logistics_cost + lab_svh_cost +
+                korea_inland_transport + korea_port_transport_loading + vladivostok_expenses +
+                logistics_vladivostok_kazan + car_preparation + other_expenses + excise_tax + delivery_to_region_cost
+        )
+
+        vat = 0
+
+        rate_to_original_currency = rates.get(currency, 1.0)
+        total_cost_original_currency = total_cost_rub / rate_to_original_currency
+
+        return CostBreakdown(
+            car_cost=cost_rub,
+            dealer_commission=dealer_commission,
+            customs_payments=customs_payments,
+            customs_clearance=customs_clearance,
+            recycling_fee=recycling_fee,
+            china_documents_delivery=china_documents_delivery,
+            logistics_cost=logistics_cost,
+            lab_svh_cost=lab_svh_cost,
+            korea_inland_transport=korea_inland_transport,
+            korea_port_transport_loading=korea_port_transport_loading,
+            vladivostok_expenses=vladivostok_expenses,
+            logistics_vladivostok_kazan=logistics_vladivostok_kazan,
+            car_preparation=car_preparation,
+            other_expenses=other_expenses,
+            excise_tax=excise_tax,
+            delivery_to_region_cost=delivery_to_region_cost,
+            vat=vat,
+            total_cost=total_cost_original_currency,
+            total_cost_rub=total_cost_rub
+        )
+
+    # Same arithmetic as calculate(), applied column-wise. Every component is summed in
+    # the same order as the scalar path so the float results are bit-for-bit identical.
+    def calculate_batch(self, age, cost, country, volume, engine_type='ice',
+                        is_from_kazan=None, power=0.0) -> np.ndarray:
+        rates = self.rates
+        calc_config = self.calc_config
+        cost = np.asarray(cost, dtype=np.float64)
+        n = cost.shape[0]
+        age = _column(age, n, object)
+        country = _column(country, n, object)
+        volume = _column(volume, n, np.float64)
+        engine_type = _column(engine_type, n, object)
+        is_from_kazan = _column(is_from_kazan, n, object)
+        power = _column(power, n, np.float64)
+
+        result = np.zeros(n, dtype=COST_DTYPE)
+
+        eur_rate = self.eur_rate
+        usd_rate = self.usd_rate
+        cny_rate = self.cny_rate
+        krw_rate = self.krw_rate
+
+        is_china = country == 'china'
+        is_korea = country == 'korea'
+        is_electro = engine_type == 'electro'
+        is_young = age == 'year_less_3'
+        not_from_kazan = is_from_kazan == 'no'
+
+        rate_to_currency = np.ones(n)
+        for country_code, currency in COUNTRY_CURRENCY_MAP.items():
+            rate_to_currency[country == country_code] = rates.get(currency, 1.0)
+
+        cost_rub = cost * rate_to_currency
+        cost_eur = cost_rub / eur_rate
+
+        customs_payments_eur = np.zeros(n)
+        for age_code, age_category in AGE_CATEGORIES.items():
+            mask = (age == age_code) & ~is_electro
+            if not mask.any():
+                continue
+            table = CUSTOMS_PAYMENTS_RATES[age_category]
+            if 'by_cost' in table:
+                row = _lookup_array(table['by_cost'], cost_eur[mask])
+                customs_payments_eur[mask] = np.maximum(cost_eur[mask] * row[:, 0], row[:, 1] * volume[mask])
+            else:
+                customs_payments_eur[mask] = _lookup_array(table['by_volume'], volume[mask]) * volume[mask]
+        customs_payments_eur[is_electro] = cost_eur[is_electro] * 0.15
+        customs_payments = customs_payments_eur * eur_rate
+
+        electric_fees = RECYCLING_FEE_RATES['electric_hybrid']
+        ice_fees = RECYCLING_FEE_RATES['ice']
+        recycling_fee = np.where(
+            is_electro,
+            np.where(is_young, electric_fees['up_to_3'], electric_fees['older']),
+            np.where(is_young, _lookup_array(ice_fees['up_to_3'], volume), _lookup_array(ice_fees['older'], volume))
+        ).astype(np.float64)
+
+        customs_clearance = _lookup_array(CUSTOMS_CLEARANCE_FEES, cost_rub).astype(np.float64)
+
+        power_hp = power / KW_PER_HP
+        excise_tax = np.where(is_electro, power_hp * _lookup_array(EXCISE_TAX_RATES, power_hp), 0.0)
+
+        china_config = calc_config.china
+        korea_config = calc_config.korea
+        result['dealer_commission'][is_china] = china_config.dealer_commission
+        result['dealer_commission'][is_korea] = korea_config.dealer_commission_krw * krw_rate
+        result['china_documents_delivery'][is_china] = china_config.documents_delivery_cny * cny_rate
+        result['logistics_cost'][is_china] = china_config.logistics_kazan_usd * usd_rate + china_config.logistics_kazan_rub
+        result['lab_svh_cost'][is_china & ~not_from_kazan] = china_config.lab_svh_kazan_rub
+        result['korea_inland_transport'][is_korea] = korea_config.inland_transport_krw * krw_rate
+        result['korea_port_transport_loading'][is_korea] = korea_config.port_transport_loading_krw * krw_rate
+        result['vladivostok_expenses'][is_korea] = korea_config.vladivostok_expenses_rub
+        result['logistics_vladivostok_kazan'][is_korea] = korea_config.logistics_vladivostok_kazan_rub
+        result['car_preparation'][is_korea] = korea_config.car_preparation_rub
+        result['other_expenses'][is_china] = china_config.other_expenses_rub
+        result['other_expenses'][is_korea] = korea_config.other_expenses_rub
+        result['delivery_to_region_cost'][is_china & not_from_kazan] = china_config.lab_svh_not_kazan_rub
+        result['delivery_to_region_cost'][is_korea & not_from_kazan] = calc_config.general.delivery_to_region_rub
+
+        result['car_cost'] = cost_rub
+        result['customs_payments'] = customs_payments
+        result['customs_clearance'] = customs_clearance
+        result['recycling_fee'] = recycling_fee
+        result['excise_tax'] = excise_tax
+
+        total_cost_rub = (
+                cost_rub + result['dealer_commission'] + customs_payments + recycling_fee +
+                customs_clearance + result['china_documents_delivery'] + result['logistics_cost'] +
+                result['lab_svh_cost'] + result['korea_inland_transport'] + result['korea_port_transport_loading'] +
+                result['vladivostok_expenses'] + result['logistics_vladivostok_kazan'] + result['car_preparation'] +
+                result['other_expenses'] + excise_tax + result['delivery_to_region_cost']
+        )
+        result['total_cost_rub'] = total_cost_rub
+        result['total_cost'] = total_cost_rub / rate_to_currency
+        return result
+
+
+# Identifies one calculation: the user inputs plus the rates table and config version
+# they were priced with, so a cached result is dropped when either of those changes.
+def calculation_key(inputs: tuple, rates_date: date, config_version: str) -> str:
+    payload = json.dumps([list(inputs), rates_date.isoformat(), config_version])
+    return hashlib.sha1(payload.encode()).hexdigest()
 
 
 async def calculate_cost(age: str, cost: int, country: str, volume: int, calc_config: UserCalcConfig,
                          engine_type: str = 'ice', is_from_kazan: str | None = None, power: float = 0) -> dict:
     rates = await get_rates()
+    return CostCalculator(rates, calc_config).calculate(
+        age, cost, country, volume, engine_type, is_from_kazan, power
+    ).as_dict()
 
-    currency = COUNTRY_CURRENCY_MAP.get(country)
-
-    cost_rub = cost * rates.get(currency, 1.0)
-    eur_rate = rates.get('EUR', 90.0)
-    usd_rate = rates.get('USD', 90.0)
-    cny_rate = rates.get('CNY', 12.0)
-    krw_rate = rates.get('KRW', 0.07)
-    cost_eur = cost_rub / eur_rate
-
-    customs_payments_eur = _calculate_customs_payments(age, cost_eur, volume, engine_type)
-    customs_payments = customs_payments_eur * eur_rate
 
-    recycling_fee = _calculate_recycling_fee(age, volume, engine_type)
-    customs_clearance = _calculate_customs_clearance(cost_rub)
-
-    excise_tax = 0
-    if engine_type == 'electro':
-        excise_tax = _calculate_excise_tax(power)
-
-    
-    delivery_to_region_cost = 0
-    dealer_commission = 0
-    china_documents_delivery = 0
-    logistics_cost = 0
-    lab_svh_cost = 0
-    korea_inland_transport = 0
-    korea_port_transport_loading = 0
-    vladivostok_expenses = 0
-    logistics_vladivostok_kazan = 0
-    car_preparation = 0
-    other_expenses = 0
-
-    if country == 'china':
-        china_config = calc_config.china
-        dealer_commission = china_config.dealer_commission
-        china_documents_delivery = china_config.documents_delivery_cny * cny_rate
-        logistics_cost = china_config.logistics_kazan_usd * usd_rate + china_config.logistics_kazan_rub
-        other_expenses = china_config.other_expenses_rub
-        if is_from_kazan == 'no':
-            delivery_to_region_cost = china_config.lab_svh_not_kazan_rub
-        else:
-            lab_svh_cost = china_config.lab_svh_kazan_rub
-
-    elif country == 'korea':
-        korea_config = calc_config.korea
-        dealer_commission = korea_config.dealer_commission_krw * krw_rate
-        korea_inland_transport = korea_config.inland_transport_krw * krw_rate
-        korea_port_transport_loading = korea_config.port_transport_loading_krw * krw_rate
-        vladivostok_expenses = korea_config.vladivostok_expenses_rub
-        logistics_vladivostok_kazan = korea_config.logistics_vladivostok_kazan_rub
-        car_preparation = korea_config.car_preparation_rub
-        other_expenses = korea_config.other_expenses_rub
-        
-        if is_from_kazan == 'no':
-            delivery_to_region_cost = calc_config.general.delivery_to_region_rub
-
-    total_cost_rub = (
-            cost_rub + dealer_commission + customs_payments + recycling_fee +
-            customs_clearance + china_documents_delivery + logistics_cost + lab_svh_cost +
-            korea_inland_transport + korea_port_transport_loading + vladivostok_expenses +
-            logistics_vladivostok_kazan + car_preparation + other_expenses + excise_tax + delivery_to_region_cost
+async def calculate_cost_batch(age, cost, country, volume, calc_config: UserCalcConfig,
+                               engine_type='ice', is_from_kazan=None, power=0.0) -> np.ndarray:
+    rates = await get_rates()
+    return CostCalculator(rates, calc_config).calculate_batch(
+        age, cost, country, volume, engine_type, is_from_kazan, power
     )
-
-    vat = 0
-    
-
-    
-    rate_to_original_currency = rates.get(currency, 1.0)
-    total_cost_original_currency = total_cost_rub / rate_to_original_currency
-
-    return {
-        "car_cost": cost_rub,
-        "dealer_commission": dealer_commission,
-        "customs_payments": customs_payments,
-        "customs_clearance": customs_clearance,
-        "recycling_fee": recycling_fee,
-        "china_documents_delivery": china_documents_delivery,
-        "logistics_cost": logistics_cost,
-        "lab_svh_cost": lab_svh_cost,
-        "korea_inland_transport": korea_inland_transport,
-        "korea_port_transport_loading": korea_port_transport_loading,
-        "vladivostok_expenses": vladivostok_expenses,
-        "logistics_vladivostok_kazan": logistics_vladivostok_kazan,
-        "car_preparation": car_preparation,
-        "other_expenses": other_expenses,
-        "excise_tax": excise_tax,
-        "delivery_to_region_cost": delivery_to_region_cost,
-        "vat": vat,
-        "total_cost": total_cost_original_currency,
-        "total_cost_rub": total_cost_rub,
-    }
\ No newline at end of file
@@ -0,0 +1,270 @@
+import asyncio
+import copy
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config.config import StorageSettings, get_project_root, write_file_atomic
+
+
+def _state_name(state: StateType) -> str | None:
+    return state.state if isinstance(state, State) else state
+
+
+# Keeps every FSM record in a Redis-protocol store: the state as a plain string key and
+# the data as a hash with one JSON-encoded field per data key. A hash lets update_data
+# write only the changed fields and read the merged result back in one pipelined round
+# trip. Both keys carry a TTL so abandoned sessions expire on their own; every read or
+# write refreshes the TTLs of both keys in the same pipeline, so the data of a user who
+# is still in a state never expires underneath them.
+class RedisHashStorage(BaseStorage):
+    def __init__(self, redis, key_builder: KeyBuilder | None = None,
+                 state_ttl: int | None = None, data_ttl: int | None = None):
+        self.redis = redis
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self.state_ttl = state_ttl
+        self.data_ttl = data_ttl
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisHashStorage':
+        from redis.asyncio import Redis
+        return cls(Redis.from_url(url), **kwargs)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            self._queue_set_state(pipe, key, state)
+            self._queue_touch(pipe, key)
+            await pipe.execute()
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(self.key_builder.build(key, 'state'))
+            self._queue_touch(pipe, key)
+            results = await pipe.execute()
+        return self._decode_state(results[0])
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            self._queue_set_data(pipe, key, data)
+            self._queue_touch(pipe, key)
+            await pipe.execute()
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self.key_builder.build(key, 'data'))
+            self._queue_touch(pipe, key)
+            results = await pipe.execute()
+        return self._decode(results[0])
+
+    async def get_value(self, storage_key: StorageKey, dict_key: str, default: Optional[Any] = None) -> Optional[Any]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hget(self.key_builder.build(storage_key, 'data'), dict_key)
+            self._queue_touch(pipe, storage_key)
+            results = await pipe.execute()
+        return default if results[0] is None else json.loads(results[0])
+
+    async def update_data(self, key: StorageKey, data: Mapping[str, Any]) -> Dict[str, Any]:
+        if not data:
+            return await self.get_data(key)
+        redis_key = self.key_builder.build(key, 'data')
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(redis_key, mapping=self._encode(data))
+            self._queue_touch(pipe, key)
+            pipe.hgetall(redis_key)
+            results = await pipe.execute()
+        return self._decode(results[-1])
+
+    async def get_state_and_data(self, key: StorageKey) -> tuple[Optional[str], Dict[str, Any]]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(self.key_builder.build(key, 'state'))
+            pipe.hgetall(self.key_builder.build(key, 'data'))
+            self._queue_touch(pipe, key)
+            state, data, *_ = await pipe.execute()
+        return self._decode_state(state), self._decode(data)
+
+    async def set_state_and_data(self, key: StorageKey, state: StateType, data: Mapping[str, Any]) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            self._queue_set_state(pipe, key, state)
+            self._queue_set_data(pipe, key, data)
+            self._queue_touch(pipe, key)
+            await pipe.execute()
+
+    # Like set_state_and_data, but only writes the given fields and leaves the rest of
+    # the hash alone, so fields written meanwhile by another update survive.
+    async def set_state_and_update_data(self, key: StorageKey, state: StateType, data: Mapping[str, Any]) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            self._queue_set_state(pipe, key, state)
+            if data:
+                pipe.hset(self.key_builder.build(key, 'data'), mapping=self._encode(data))
+            self._queue_touch(pipe, key)
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+    def _queue_set_state(self, pipe, key: StorageKey, state: StateType):
+        redis_key = self.key_builder.build(key, 'state')
+        state = _state_name(state)
+        if state is None:
+            pipe.delete(redis_key)
+        else:
+            pipe.set(redis_key, state)
+
+    def _queue_set_data(self, pipe, key: StorageKey, data: Mapping[str, Any]):
+        redis_key = self.key_builder.build(key, 'data')
+        pipe.delete(redis_key)
+        if data:
+            pipe.hset(redis_key, mapping=self._encode(data))
+
+    # EXPIRE on a missing key is a no-op, so this is safe after a delete.
+    def _queue_touch(self, pipe, key: StorageKey):
+        for part, ttl in (('state', self.state_ttl), ('data', self.data_ttl)):
+            if ttl:
+                pipe.expire(self.key_builder.build(key, part), ttl)
+
+    @staticmethod
+    def _decode_state(value) -> Optional[str]:
+        return value.decode() if isinstance(value, bytes) else value
+
+    @staticmethod
+    def _encode(data: Mapping[str, Any]) -> dict[str, str]:
+        return {name: json.dumps(value, ensure_ascii=False) for name, value in data.items()}
+
+    @staticmethod
+    def _decode(raw: Mapping) -> Dict[str, Any]:
+        return {
+            (name.decode() if isinstance(name, bytes) else name): json.loads(value)
+            for name, value in raw.items()
+        }
+
+
+# Local stand-in for RedisHashStorage: records live in memory and are written to a JSON
+# file shortly after each change (and on close), with the same TTL semantics.
+class FileStorage(BaseStorage):
+    def __init__(self, path: str, key_builder: KeyBuilder | None = None,
+                 state_ttl: int | None = None, data_ttl: int | None = None, flush_interval: float = 1.0):
+        self.path = path
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self.state_ttl = state_ttl
+        self.data_ttl = data_ttl
+        self.flush_interval = flush_interval
+        self._records: dict[str, dict[str, Any]] = self._read()
+        self._flush_task: asyncio.Task | None = None
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        self._put(self.key_builder.build(key, 'state'), _state_name(state), self.state_ttl)
+        self._touch(key)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state = self._get(self.key_builder.build(key, 'state'))
+        self._touch(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        self._put(self.key_builder.build(key, 'data'), copy.deepcopy(dict(data)) or None, self.data_ttl)
+        self._touch(key)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        data = copy.deepcopy(self._get(self.key_builder.build(key, 'data')) or {})
+        self._touch(key)
+        return data
+
+    async def get_state_and_data(self, key: StorageKey) -> tuple[Optional[str], Dict[str, Any]]:
+        return await self.get_state(key), await self.get_data(key)
+
+    async def set_state_and_data(self, key: StorageKey, state: StateType, data: Mapping[str, Any]) -> None:
+        await self.set_state(key, state)
+        await self.set_data(key, data)
+
+    async def set_state_and_update_data(self, key: StorageKey, state: StateType, data: Mapping[str, Any]) -> None:
+        await self.set_state(key, state)
+        await self.update_data(key, data)
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self._flush()
+
+    def _get(self, record_key: str) -> Any:
+        record = self._records.get(record_key)
+        if record is None:
+            return None
+        if record['expires_at'] is not None and record['expires_at'] <= time.time():
+            del self._records[record_key]
+            return None
+        return record['value']
+
+    def _put(self, record_key: str, value: Any, ttl: int | None):
+        if value is None:
+            self._records.pop(record_key, None)
+        else:
+            self._records[record_key] = {'value': value, 'expires_at': time.time() + ttl if ttl else None}
+        self._schedule_flush()
+
+    # Extends the state and data records of `key` together, like RedisHashStorage does.
+    def _touch(self, key: StorageKey):
+        touched = False
+        for part, ttl in (('state', self.state_ttl), ('data', self.data_ttl)):
+            record = self._records.get(self.key_builder.build(key, part))
+            if ttl and record is not None:
+                record['expires_at'] = time.time() + ttl
+                touched = True
+        if touched:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    def _read(self) -> dict[str, dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            logging.warning(f"Could not read FSM storage file {self.path}, starting empty: {e}")
+            return {}
+        now = time.time()
+        return {k: r for k, r in records.items() if r['expires_at'] is None or r['expires_at'] > now}
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._flush_task = None
+        await self._flush()
+
+    async def _flush(self):
+        now = time.time()
+        self._records = {k: r for k, r in self._records.items() if r['expires_at'] is None or r['expires_at'] > now}
+        content = json.dumps(self._records, ensure_ascii=False)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            await asyncio.to_thread(write_file_atomic, self.path, content)
+        except OSError as e:
+            logging.warning(f"Could not write FSM storage file {self.path}: {e}")
+
+
+def create_storage(settings: StorageSettings) -> BaseStorage:
+    url = settings.url
+    ttls = {'state_ttl': settings.state_ttl or None, 'data_ttl': settings.data_ttl or None}
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisHashStorage.from_url(url, **ttls)
+    if url.startswith('fakeredis://'):
+        from fakeredis.aioredis import FakeRedis
+        return RedisHashStorage(FakeRedis(), **ttls)
+    if url.startswith('file://'):
+        path = url.removeprefix('file://')
+        if not os.path.isabs(path):
+            path = os.path.join(get_project_root(), path)
+        return FileStorage(path, **ttls)
+    if url.startswith('memory://'):
+        return MemoryStorage()
+    raise ValueError(f"Unsupported FSM_STORAGE_URL: {url}")
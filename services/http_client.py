@@ -0,0 +1,91 @@
+import codecs
+import logging
+import re
+from dataclasses import dataclass
+
+import aiohttp
+
+from config.config import HttpSettings
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_\-]+)', re.IGNORECASE)
+META_SNIFF_BYTES = 4096
+# GB2312 and GBK pages routinely contain characters only GB18030 covers.
+CHARSET_ALIASES = {'gb2312': 'gb18030', 'gbk': 'gb18030', 'x-gbk': 'gb18030'}
+
+class FetchError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class FetchedPage:
+    url: str
+    text: str
+    charset: str
+    size: int
+    truncated: bool
+
+
+def _detect_charset(response: aiohttp.ClientResponse, head: bytes) -> str:
+    charset = response.charset
+    if not charset:
+        match = META_CHARSET_RE.search(head[:META_SNIFF_BYTES])
+        charset = match.group(1).decode('ascii') if match else 'utf-8'
+    charset = CHARSET_ALIASES.get(charset.lower(), charset.lower())
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        charset = 'utf-8'
+    return charset
+
+
+class HttpClient:
+    def __init__(self, settings: HttpSettings):
+        self.settings = settings
+        self._session: aiohttp.ClientSession | None = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.settings.limit,
+                limit_per_host=self.settings.limit_per_host,
+                keepalive_timeout=self.settings.keepalive_timeout,
+                ttl_dns_cache=self.settings.dns_cache_ttl,
+                use_dns_cache=True
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=self.settings.total_timeout,
+                sock_connect=self.settings.connect_timeout,
+                sock_read=self.settings.read_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    # Streams an HTML page in chunks, keeping at most `page_max_bytes` of it. Pages are
+    # read to the end otherwise: parsers search the whole text, and a fully read
+    # response leaves the connection free for keep-alive reuse.
+    async def fetch_page(self, url: str) -> FetchedPage:
+        async with self.session.get(url) as response:
+            if response.status != 200:
+                raise FetchError(f"Failed to load page, status: {response.status}")
+            if response.content_type not in HTML_CONTENT_TYPES:
+                raise FetchError(f"Unexpected content type: {response.content_type}")
+
+            buffer = bytearray()
+            truncated = False
+            async for chunk in response.content.iter_chunked(self.settings.page_chunk_size):
+                buffer += chunk
+                if len(buffer) > self.settings.page_max_bytes:
+                    del buffer[self.settings.page_max_bytes:]
+                    truncated = True
+                    logging.warning(f"{url} is larger than {self.settings.page_max_bytes} bytes, truncated")
+                    break
+
+        charset = _detect_charset(response, bytes(buffer[:META_SNIFF_BYTES]))
+        return FetchedPage(url, buffer.decode(charset, errors='replace'), charset, len(buffer), truncated)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
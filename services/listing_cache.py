@@ -0,0 +1,104 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from config.config import ListingCacheSettings, get_project_root, write_file_atomic
+
+Loader = Callable[[], Awaitable[tuple[dict | None, str | None]]]
+
+
+# Parsed listings keyed by normalized URL. Only successful parses are kept, for `ttl`
+# seconds and at most `max_size` of them (least recently used go first). Concurrent
+# lookups of the same URL share one in-flight load, and with a `path` the entries are
+# written to disk shortly after each change so they survive restarts.
+class ListingCache:
+    def __init__(self, settings: ListingCacheSettings, flush_interval: float = 5.0):
+        self.ttl = settings.ttl
+        self.max_size = settings.max_size
+        self.path = settings.path
+        if self.path and not os.path.isabs(self.path):
+            self.path = os.path.join(get_project_root(), self.path)
+        self.flush_interval = flush_interval
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict(self._read())
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._flush_task: asyncio.Task | None = None
+
+    async def get_or_load(self, url: str, loader: Loader) -> tuple[dict | None, str | None]:
+        cached = self.get(url)
+        if cached is not None:
+            return cached, None
+
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.create_task(self._load(url, loader))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        data, error = await asyncio.shield(task)
+        return (dict(data) if data is not None else None), error
+
+    def get(self, url: str) -> dict | None:
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        data, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[url]
+            return None
+        self._entries.move_to_end(url)
+        return dict(data)
+
+    def set(self, url: str, data: dict):
+        self._entries[url] = (dict(data), time.time() + self.ttl)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        if self.path and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def close(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        if self.path:
+            await self._flush()
+
+    async def _load(self, url: str, loader: Loader) -> tuple[dict | None, str | None]:
+        data, error = await loader()
+        if data is not None and not error:
+            self.set(url, data)
+        return data, error
+
+    def _read(self) -> list[tuple[str, tuple[dict, float]]]:
+        if not self.path:
+            return []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return []
+        except ValueError as e:
+            logging.warning(f"Could not read listing cache {self.path}, starting empty: {e}")
+            return []
+        now = time.time()
+        return [(url, (data, expires_at)) for url, data, expires_at in stored if expires_at > now]
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._flush_task = None
+        await self._flush()
+
+    async def _flush(self):
+        now = time.time()
+        stored = [[url, data, expires_at] for url, (data, expires_at) in self._entries.items() if expires_at > now]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            await asyncio.to_thread(write_file_atomic, self.path, json.dumps(stored, ensure_ascii=False))
+        except OSError as e:
+            logging.warning(f"Could not persist listing cache to {self.path}: {e}")
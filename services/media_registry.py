@@ -0,0 +1,69 @@
+import asyncio
+import json
+import logging
+import os
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from config.config import get_project_root, write_file_atomic
+
+
+# Remembers the file_id Telegram assigned to each uploaded resource so it is sent by
+# reference afterwards. Keys include the bot id (file_ids are per bot) and the file's
+# mtime and size, so replacing a resource on disk triggers a fresh upload.
+class MediaRegistry:
+    def __init__(self, path: str):
+        self.path = path
+        self._file_ids: dict[str, str] | None = None
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def answer_photo(self, message: Message, resource_path: str, **kwargs) -> Message:
+        key = self._key(message.bot.id, resource_path)
+        file_ids = self._load()
+
+        file_id = file_ids.get(key)
+        if file_id:
+            try:
+                return await message.answer_photo(photo=file_id, **kwargs)
+            except TelegramBadRequest as e:
+                logging.warning(f"Cached file_id for {resource_path} was rejected, uploading again: {e}")
+                file_ids.pop(key, None)
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            file_id = file_ids.get(key)
+            if file_id:
+                return await message.answer_photo(photo=file_id, **kwargs)
+            sent = await message.answer_photo(photo=FSInputFile(resource_path), **kwargs)
+            file_ids[key] = sent.photo[-1].file_id
+            await self._save()
+            return sent
+
+    def _key(self, bot_id: int, resource_path: str) -> str:
+        stat = os.stat(resource_path)
+        name = os.path.relpath(resource_path, get_project_root())
+        return f"{bot_id}:{name}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _load(self) -> dict[str, str]:
+        if self._file_ids is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._file_ids = json.load(f)
+            except FileNotFoundError:
+                self._file_ids = {}
+            except ValueError as e:
+                logging.warning(f"Could not read {self.path}, starting with an empty media registry: {e}")
+                self._file_ids = {}
+        return self._file_ids
+
+    async def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        content = json.dumps(self._file_ids, indent=4)
+        try:
+            await asyncio.to_thread(write_file_atomic, self.path, content)
+        except OSError as e:
+            logging.warning(f"Could not persist media registry to {self.path}: {e}")
+
+
+media_registry = MediaRegistry(os.path.join(get_project_root(), 'data', 'media_registry.json'))
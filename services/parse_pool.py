@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from config.config import ParseSettings
+
+
+class ParsePoolBusy(Exception):
+    pass
+
+
+@dataclass
+class ParseStats:
+    pending: int = 0
+    completed: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    failed: int = 0
+    total_parse_time: float = 0.0
+    max_parse_time: float = 0.0
+
+    @property
+    def average_parse_time(self) -> float:
+        return self.total_parse_time / self.completed if self.completed else 0.0
+
+
+def _timed_call(func: Callable, *args) -> tuple[Any, float]:
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+# Runs CPU-bound parsers off the event loop, in worker processes (default) or threads.
+# At most `max_pending` jobs may be queued or running; further ones are rejected with
+# ParsePoolBusy instead of piling up, and a caller stops waiting after `timeout` seconds.
+class ParsePool:
+    def __init__(self, settings: ParseSettings):
+        self.settings = settings
+        self.stats = ParseStats()
+        self._executor: Executor | None = None
+
+    async def run(self, func: Callable, *args) -> Any:
+        if self.stats.pending >= self.settings.max_pending:
+            self.stats.rejected += 1
+            raise ParsePoolBusy(f"{self.stats.pending} parse jobs are already pending")
+
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        executor, job = self._submit(func, *args)
+        # A job stays pending until the worker is really done with it: a caller that timed
+        # out stops waiting, but the job keeps its slot until it finishes.
+        self.stats.pending += 1
+        job.add_done_callback(lambda _: loop.call_soon_threadsafe(self._job_finished))
+        try:
+            result, parse_time = await asyncio.wait_for(asyncio.wrap_future(job), timeout=self.settings.timeout)
+        except asyncio.TimeoutError:
+            self.stats.timed_out += 1
+            logging.warning(f"{func.__name__} did not finish within {self.settings.timeout}s")
+            raise
+        except BrokenProcessPool:
+            self.stats.failed += 1
+            # Waiters on the dead pool can arrive after a fresh one was already started.
+            self._discard_executor(executor)
+            raise
+        except Exception:
+            self.stats.failed += 1
+            raise
+
+        self.stats.completed += 1
+        self.stats.total_parse_time += parse_time
+        self.stats.max_parse_time = max(self.stats.max_parse_time, parse_time)
+        logging.info(
+            f"{func.__name__}: parsed in {parse_time * 1000:.0f} ms, "
+            f"waited {(time.perf_counter() - submitted - parse_time) * 1000:.0f} ms, "
+            f"queue depth {self.stats.pending}"
+        )
+        return result
+
+    def _submit(self, func: Callable, *args) -> tuple[Executor, Future]:
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(_timed_call, func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start over with a fresh pool.
+            logging.warning("Parse process pool is broken, recreating it")
+            self._discard_executor(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(_timed_call, func, *args)
+
+    def _job_finished(self):
+        self.stats.pending -= 1
+
+    def _discard_executor(self, executor: Executor | None = None):
+        if self._executor is None or (executor is not None and executor is not self._executor):
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def shutdown(self):
+        self._discard_executor()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.settings.executor == 'thread':
+                self._executor = ThreadPoolExecutor(self.settings.workers, thread_name_prefix='parse')
+            else:
+                # spawn rather than fork: the bot process already runs helper threads.
+                self._executor = ProcessPoolExecutor(
+                    self.settings.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+        return self._executor
@@ -1,9 +1,10 @@
 import re
 import json
 import logging
-from bs4 import BeautifulSoup
 import aiohttp
-from playwright.async_api import async_playwright
+from lxml import etree
+
+from services.browser_pool import BrowserPool
 
 def validate_and_normalize_url(url: str) -> tuple[str | None, str | None]:
     if 'che168.com' in url:
@@ -12,89 +13,214 @@ def validate_and_normalize_url(url: str) -> tuple[str | None, str | None]:
         return url.split('?')[0], None
     return None, "Пожалуйста, отправьте ссылку на сайт che168.com или encar.com"
 
-async def parse_encar_playwright(url: str) -> tuple[dict, str | None]:
-    logging.info(f"Starting to parse encar.com data using Playwright for URL: {url}")
-    data = {
+ENCAR_VEHICLE_API_URL = 'https://api.encar.com/v1/readside/vehicle/{car_id}'
+PRELOADED_STATE_MARKER = 'window.__PRELOADED_STATE__'
+
+
+def _empty_encar_data() -> dict:
+    return {
         'car_name': None, 'year': None, 'month': None, 'mileage': None, 'cost': None,
         'currency': 'KRW', 'volume': None, 'power': None, 'power_unit': None,
         'country': 'korea', 'engine_type': None
     }
+
+def _fill_encar_data(data: dict, car_info: dict | None) -> str | None:
     error = None
-    
-    async with async_playwright() as p:
-        try:
-            browser = await p.chromium.launch(headless=False)
-            context = await browser.new_context(
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36'
-            )
-            page = await context.new_page()
-            await page.goto(url, wait_until='domcontentloaded', timeout=60000)
+    if car_info:
+        category_info = car_info.get('category', {})
+        if category_info:
+            manufacturer = category_info.get('manufacturerName', '')
+            model = category_info.get('modelGroupName', '')
+            grade = category_info.get('gradeDetailName', '')
+            data['car_name'] = f"{manufacturer} {model} {grade}".strip()
 
+            year_month = str(category_info.get('yearMonth'))
+            if len(year_month) == 6:
+                data['year'] = int(year_month[:4])
+                data['month'] = int(year_month[4:])
+
+        advertisement_info = car_info.get('advertisement', {})
+        if advertisement_info and advertisement_info.get('price'):
+            try:
+                data['cost'] = int(advertisement_info['price']) * 10000
+            except (ValueError, TypeError):
+                logging.warning(f"Could not parse price from preloaded state: {advertisement_info['price']}")
+
+        spec_info = car_info.get('spec', {})
+        if spec_info:
+            data['mileage'] = spec_info.get('mileage')
+            data['volume'] = spec_info.get('displacement')
+            fuel_name = spec_info.get('fuelName', '').lower()
+            if '가솔린' in fuel_name or '디젤' in fuel_name:
+                data['engine_type'] = 'ice'
+            elif '전기' in fuel_name:
+                data['engine_type'] = 'electro'
+                data['volume'] = 0
+    else:
+        error = "Could not find 'base' info in __PRELOADED_STATE__"
+
+    required_fields = ['year', 'cost', 'car_name', 'mileage']
+    if data.get('engine_type') != 'electro':
+        required_fields.append('volume')
+
+    if not all(data.get(k) for k in required_fields):
+        if not error:
+            error = "Не удалось извлечь все данные из __PRELOADED_STATE__."
+        logging.error(f"Failed to parse all required data from encar.com. Data: {data}")
+    return error
+
+def extract_preloaded_state(html_content: str) -> dict | None:
+    marker = html_content.find(PRELOADED_STATE_MARKER)
+    if marker == -1:
+        return None
+    start = html_content.find('{', marker + len(PRELOADED_STATE_MARKER))
+    if start == -1:
+        return None
+    try:
+        state, _ = json.JSONDecoder().raw_decode(html_content, start)
+    except ValueError:
+        return None
+    return state if isinstance(state, dict) else None
+
+def _encar_car_id(url: str) -> str | None:
+    match = re.search(r'/detail/(\d+)', url)
+    return match.group(1) if match else None
+
+async def parse_encar_http(url: str, session: aiohttp.ClientSession) -> tuple[dict, str | None]:
+    logging.info(f"Starting to parse encar.com data over HTTP for URL: {url}")
+    data = _empty_encar_data()
+    car_info = None
+    try:
+        async with session.get(url) as response:
+            if response.status == 200:
+                preloaded_state = extract_preloaded_state(await response.text())
+                if preloaded_state:
+                    car_info = preloaded_state.get('cars', {}).get('base', {})
+        car_id = _encar_car_id(url)
+        if not car_info and car_id:
+            async with session.get(ENCAR_VEHICLE_API_URL.format(car_id=car_id)) as response:
+                if response.status == 200:
+                    car_info = await response.json(content_type=None)
+        error = _fill_encar_data(data, car_info)
+    except Exception as e:
+        error = f"Произошла непредвиденная ошибка при загрузке encar.com: {e}"
+        logging.warning(error)
+    return data, error
+
+async def parse_encar_playwright(url: str, browser_pool: BrowserPool) -> tuple[dict, str | None]:
+    logging.info(f"Starting to parse encar.com data using Playwright for URL: {url}")
+    data = _empty_encar_data()
+    error = None
+
+    try:
+        async with browser_pool.page() as page:
+            await page.goto(url, wait_until='domcontentloaded')
             preloaded_state = await page.evaluate("window.__PRELOADED_STATE__")
 
-            if preloaded_state:
-                logging.info("Found __PRELOADED_STATE__. Parsing data from it.")
-                car_info = preloaded_state.get('cars', {}).get('base', {})
-                if car_info:
-                    category_info = car_info.get('category', {})
-                    if category_info:
-                        manufacturer = category_info.get('manufacturerName', '')
-                        model = category_info.get('modelGroupName', '')
-                        grade = category_info.get('gradeDetailName', '')
-                        data['car_name'] = f"{manufacturer} {model} {grade}".strip()
-                        
-                        year_month = str(category_info.get('yearMonth'))
-                        if len(year_month) == 6:
-                            data['year'] = int(year_month[:4])
-                            data['month'] = int(year_month[4:])
-
-                    advertisement_info = car_info.get('advertisement', {})
-                    if advertisement_info and advertisement_info.get('price'):
-                        try:
-                            data['cost'] = int(advertisement_info['price']) * 10000
-                        except (ValueError, TypeError):
-                            logging.warning(f"Could not parse price from preloaded state: {advertisement_info['price']}")
-                    
-                    spec_info = car_info.get('spec', {})
-                    if spec_info:
-                        data['mileage'] = spec_info.get('mileage')
-                        data['volume'] = spec_info.get('displacement')
-                        fuel_name = spec_info.get('fuelName', '').lower()
-                        if '가솔린' in fuel_name or '디젤' in fuel_name:
-                            data['engine_type'] = 'ice'
-                        elif '전기' in fuel_name:
-                            data['engine_type'] = 'electro'
-                            data['volume'] = 0
-
-                else:
-                    error = "Could not find 'base' info in __PRELOADED_STATE__"
-            else:
-                error = "Could not find __PRELOADED_STATE__ in page."
-                logging.warning(error)
-
-
-            required_fields = ['year', 'cost', 'car_name', 'mileage']
-            if data.get('engine_type') != 'electro':
-                required_fields.append('volume')
-
-            if not all(data.get(k) for k in required_fields):
-                if not error:
-                    error = "Не удалось извлечь все данные из __PRELOADED_STATE__."
-                logging.error(f"Failed to parse all required data from encar.com. Data: {data}")
-
-        except Exception as e:
-            error = f"Произошла непредвиденная ошибка при парсинге encar.com с помощью Playwright: {e}"
-            logging.error(error)
-        finally:
-            if 'browser' in locals() and browser:
-                await browser.close()
+        if preloaded_state:
+            logging.info("Found __PRELOADED_STATE__. Parsing data from it.")
+            error = _fill_encar_data(data, preloaded_state.get('cars', {}).get('base', {}))
+        else:
+            error = "Could not find __PRELOADED_STATE__ in page."
+            logging.warning(error)
+
+    except Exception as e:
+        error = f"Произошла непредвиденная ошибка при парсинге encar.com с помощью Playwright: {e}"
+        logging.error(error)
 
     logging.info(f"Final parsed data for encar.com (Playwright): {data}")
     logging.info(f"Final error state for encar.com (Playwright): {error}")
     return data, error
 
-async def parse_encar_requests(url: str) -> tuple[dict, str | None]:
-    return await parse_encar_playwright(url)
+# The preloaded state is plain JSON inside the page HTML (or served by the vehicle API),
+# so one HTTP request usually suffices; the browser is only needed when encar changes
+# the page or blocks the plain client.
+async def parse_encar_requests(url: str, session: aiohttp.ClientSession,
+                               browser_pool: BrowserPool) -> tuple[dict, str | None]:
+    data, error = await parse_encar_http(url, session)
+    if not error:
+        return data, None
+    logging.info(f"HTTP parsing of encar.com failed ({error}), falling back to the browser")
+    return await parse_encar_playwright(url, browser_pool)
+
+CHE168_INPUT_IDS = ('car_carname', 'car_firstregtime', 'car_mileage', 'car_price')
+# Text inside these tags is script/style/template/ruby data, not page text (BeautifulSoup's
+# string containers), and whitespace is kept verbatim only inside PRESERVE_WHITESPACE_TAGS.
+STRING_CONTAINER_TAGS = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+PRESERVE_WHITESPACE_TAGS = frozenset(('pre', 'textarea'))
+TEXT_SPAN_TAGS = frozenset(('li', 'p', 'span', 'div'))
+SPEC_VALUE_TAGS = ('p', 'span', 'div')
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+DIGITS_RE = re.compile(r'(\d+)')
+KW_POWER_RE = re.compile(r'(\d+)\s*kW', re.IGNORECASE)
+ENGINE_V_RE = re.compile(r'V\d')
+THREE_DIGITS_RE = re.compile(r'\d{3}')
+HP_POWER_RE = re.compile(r'(\d{3,})')
+VOLUME_RE = re.compile(r'(\d\.\d)[TL]?')
+
+HTML_FEED_CHUNK = 512
+
+
+# Fed in chunks like BeautifulSoup's lxml builder does: libxml2's push parser recovers
+# from broken markup (unclosed <style>, stray closing tags) differently than a one-shot parse.
+def _parse_html(html_content: str):
+    parser = etree.HTMLParser(strip_cdata=False, recover=True)
+    for start in range(0, len(html_content), HTML_FEED_CHUNK):
+        parser.feed(html_content[start:start + HTML_FEED_CHUNK])
+    try:
+        return parser.close()
+    except etree.XMLSyntaxError:
+        return None
+
+
+# The page reduced to what the che168 heuristics read, collected in one walk over the
+# lxml tree: the page text as a list of strings and, for every li/p/span/div, the slice
+# of that list holding its own text, in document order.
+class _Che168Page:
+    def __init__(self, html_content: str):
+        self.root = _parse_html(html_content)
+        self.inputs: dict[str, str | None] = {}
+        self.strings: list[str] = []
+        self.spans: list[list] = []
+        if self.root is not None:
+            self._walk(self.root, None, False)
+        self.text = ''.join(self.strings)
+
+    def input_value(self, input_id: str) -> str | None:
+        return self.inputs.get(input_id)
+
+    def span_text(self, span: list) -> str:
+        return ''.join(self.strings[span[2]:span[3]])
+
+    def _add_string(self, value: str, preserve: bool):
+        self.strings.append(_collapse_whitespace(value, preserve))
+
+    def _walk(self, element, container: str | None, preserve: bool):
+        tag = element.tag
+        if tag in STRING_CONTAINER_TAGS:
+            container = tag
+        preserve = preserve or tag in PRESERVE_WHITESPACE_TAGS
+        if tag == 'input':
+            input_id = element.get('id')
+            if input_id in CHE168_INPUT_IDS and input_id not in self.inputs:
+                self.inputs[input_id] = element.get('value')
+
+        span = None
+        if tag in TEXT_SPAN_TAGS:
+            span = [tag, element, len(self.strings), None]
+            self.spans.append(span)
+        visible = container is None
+        if visible and element.text:
+            self._add_string(element.text, preserve)
+        for child in element:
+            if isinstance(child.tag, str):
+                self._walk(child, container, preserve)
+            if visible and child.tail:
+                self._add_string(child.tail, preserve)
+        if span is not None:
+            span[3] = len(self.strings)
+
 
 def parse_che168_requests(html_content: str) -> tuple[dict, str | None]:
     logging.info("Starting to parse che168.com data using hidden inputs and heuristics.")
@@ -105,12 +231,9 @@ def parse_che168_requests(html_content: str) -> tuple[dict, str | None]:
     }
     error = None
     try:
-        soup = BeautifulSoup(html_content, 'lxml')
-        def get_input_val(input_id):
-            input_tag = soup.find('input', {'id': input_id})
-            return input_tag.get('value') if input_tag else None
-        data['car_name'] = get_input_val('car_carname')
-        reg_time = get_input_val('car_firstregtime')
+        page = _Che168Page(html_content)
+        data['car_name'] = page.input_value('car_carname')
+        reg_time = page.input_value('car_firstregtime')
         if reg_time:
             try:
                 year, month = reg_time.split('/')
@@ -118,50 +241,51 @@ def parse_che168_requests(html_content: str) -> tuple[dict, str | None]:
                 data['month'] = int(month)
             except (ValueError, IndexError):
                 logging.warning(f"Could not parse car_firstregtime: {reg_time}")
-        mileage_val = get_input_val('car_mileage')
+        mileage_val = page.input_value('car_mileage')
         if mileage_val:
             try:
                 data['mileage'] = int(float(mileage_val) * 10000)
             except (ValueError, TypeError):
                 logging.warning(f"Could not parse car_mileage: {mileage_val}")
-        price_val = get_input_val('car_price')
+        price_val = page.input_value('car_price')
         if price_val:
             try:
                 data['cost'] = int(float(price_val) * 10000)
             except (ValueError, TypeError):
                 logging.warning(f"Could not parse car_price: {price_val}")
-        text_content = soup.get_text()
+        text_content = page.text
         is_electric = "纯电动" in text_content
         if is_electric:
             data['engine_type'] = 'electro'
             data['volume'] = 0
             data['power_unit'] = 'кВт'
-            power_text = _find_spec_value(soup, '最大功率(kW)')
+            power_text = _find_spec_value(page, '最大功率(kW)')
             if power_text:
-                power_match = re.search(r'(\d+)', power_text)
+                power_match = DIGITS_RE.search(power_text)
                 if power_match:
                     data['power'] = int(power_match.group(1))
             if not data['power']:
-                power_match = re.search(r'(\d+)\s*kW', text_content, re.IGNORECASE)
+                power_match = KW_POWER_RE.search(text_content)
                 if power_match:
                     data['power'] = int(power_match.group(1))
         else:
             data['engine_type'] = 'ice'
-            all_lis = soup.find_all('li')
-            for li in all_lis:
-                text = li.text
-                if ('T' in text or 'L' in text) and (re.search(r'V\d', text) or re.search(r'\d{3}', text)):
-                    power_match = re.search(r'(\d{3,})', text)
+            for span in page.spans:
+                if span[0] != 'li':
+                    continue
+                text = page.span_text(span)
+                if ('T' in text or 'L' in text) and (ENGINE_V_RE.search(text) or THREE_DIGITS_RE.search(text)):
+                    power_match = HP_POWER_RE.search(text)
                     if power_match:
                         data['power'] = int(power_match.group(1))
                         data['power_unit'] = 'л.с.'
-                    volume_match = re.search(r'(\d\.\d)[TL]?', text)
+                    volume_match = VOLUME_RE.search(text)
                     if volume_match:
                         data['volume'] = int(float(volume_match.group(1)) * 1000)
                     if data['power'] and data['volume']:
                         break
             if not data['volume']:
-                volume_text = _find_spec_value(soup, '排量(L)')
+                volume_text = _find_spec_value(page, '排量(L)')
                 if volume_text:
                     try:
                         data['volume'] = 0 if volume_text == '-' else int(float(volume_text) * 1000)
@@ -172,29 +296,79 @@ def parse_che168_requests(html_content: str) -> tuple[dict, str | None]:
         logging.error(error)
     return data, error
 
-def _find_spec_value(soup: BeautifulSoup, label_text: str) -> str | None:
+def _is_spec_value_tag(element) -> bool:
+    return (element.get('class') or '').split() != ['label']
+
+# Looks for the value printed next to `label_text`. The label element is the first one
+# (in document order) whose text contains the label, which is the <html> root itself
+# whenever the label is visible text; only a label hidden in a script-like tag gives a
+# narrower element.
+def _find_spec_value(page: _Che168Page, label_text: str) -> str | None:
     try:
-        label_tag = soup.find(lambda tag: tag.name and label_text in tag.text)
-        if not label_tag:
+        if page.root is None:
+            return None
+        if label_text in page.text:
+            for span in page.spans:
+                if span[0] in SPEC_VALUE_TAGS and _is_spec_value_tag(span[1]):
+                    return page.span_text(span).strip()
             return None
-        
-        parent_li = label_tag.find_parent('li')
-        if parent_li:
-            value_tag = parent_li.find('p')
-            if value_tag:
-                return value_tag.text.strip()
-
-        parent_td = label_tag.find_parent('td')
-        if parent_td:
-            next_td = parent_td.find_next_sibling('td')
-            if next_td:
-                return next_td.text.strip()
-        
-        parent = label_tag.parent
-        value_tag = parent.find(['p', 'span', 'div'], class_=lambda x: x != 'label')
-        if value_tag:
-            return value_tag.text.strip()
+
+        label_tag = next(
+            (el for el in page.root.iter(*STRING_CONTAINER_TAGS) if label_text in _container_text(el)), None
+        )
+        if label_tag is None:
+            return None
+
+        parent_li = next(label_tag.iterancestors('li'), None)
+        if parent_li is not None:
+            value_tag = next(parent_li.iterdescendants('p'), None)
+            if value_tag is not None:
+                return _element_text(value_tag).strip()
+
+        parent_td = next(label_tag.iterancestors('td'), None)
+        if parent_td is not None:
+            next_td = next(parent_td.itersiblings('td'), None)
+            if next_td is not None:
+                return _element_text(next_td).strip()
+
+        parent = label_tag.getparent()
+        value_tag = next(
+            (el for el in parent.iterdescendants(*SPEC_VALUE_TAGS) if _is_spec_value_tag(el)), None
+        )
+        if value_tag is not None:
+            return _element_text(value_tag).strip()
 
     except Exception:
         return None
     return None
+
+def _collapse_whitespace(value: str, preserve: bool) -> str:
+    if not preserve and not value.strip(ASCII_SPACES):
+        return '\n' if '\n' in value else ' '
+    return value
+
+def _iter_strings(element, wanted: str | None, container: str | None, preserve: bool):
+    tag = element.tag
+    if tag in STRING_CONTAINER_TAGS:
+        container = tag
+    preserve = preserve or tag in PRESERVE_WHITESPACE_TAGS
+    own = container == wanted
+    if own and element.text:
+        yield _collapse_whitespace(element.text, preserve)
+    for child in element:
+        if isinstance(child.tag, str):
+            yield from _iter_strings(child, wanted, container, preserve)
+        if own and child.tail:
+            yield _collapse_whitespace(child.tail, preserve)
+
+def _subtree_text(element, wanted: str | None) -> str:
+    ancestors = list(element.iterancestors())
+    container = next((a.tag for a in ancestors if a.tag in STRING_CONTAINER_TAGS), None)
+    preserve = any(a.tag in PRESERVE_WHITESPACE_TAGS for a in ancestors)
+    return ''.join(_iter_strings(element, wanted, container, preserve))
+
+def _element_text(element) -> str:
+    return _subtree_text(element, None)
+
+def _container_text(element) -> str:
+    return _subtree_text(element, element.tag)
@@ -0,0 +1,59 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+
+# Classic token bucket: `rate` tokens per second, bursts of up to `capacity`.
+# Waiters are served by priority (lower value first), then in arrival order.
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = max(capacity if capacity is not None else rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._granter: asyncio.Task | None = None
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # Hands out nothing for the next `seconds`, e.g. after Telegram answered with retry_after.
+    def pause(self, seconds: float):
+        self._refill()
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self._waiters or self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def acquire(self, priority: int = 0):
+        if self.try_acquire():
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        if self._granter is None or self._granter.done():
+            self._granter = asyncio.create_task(self._grant())
+        await future
+
+    async def _grant(self):
+        while self._waiters:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+            *_, future = heapq.heappop(self._waiters)
+            # Cancelled waiters are skipped without spending a token.
+            if not future.done():
+                future.set_result(None)
+                self._tokens -= 1
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import sqlite3
+from datetime import date, timedelta
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS rates (
+    day TEXT NOT NULL,
+    char_code TEXT NOT NULL,
+    rate REAL NOT NULL,
+    PRIMARY KEY (day, char_code)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    day TEXT PRIMARY KEY
+) WITHOUT ROWID;
+'''
+
+
+def _days(start: date, end: date) -> list[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+# Daily CBR tables keyed by the date CBR assigned to them. `coverage` records every
+# calendar day for which the table in effect is known to be stored, so weekends and
+# holidays resolve to the latest earlier table without another request.
+class RatesStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = asyncio.Lock()
+
+    def open(self):
+        if self._conn is not None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def latest(self) -> tuple[date, dict[str, float]] | None:
+        row = self._conn.execute('SELECT MAX(day) FROM coverage').fetchone()
+        if not row or row[0] is None:
+            return None
+        covered_until = date.fromisoformat(row[0])
+        table = self._table_on(covered_until)
+        if table is None:
+            return None
+        return covered_until, table
+
+    async def get(self, on: date) -> dict[str, float] | None:
+        async with self._lock:
+            return await asyncio.to_thread(self._table_on, on)
+
+    async def missing_days(self, start: date, end: date) -> list[date]:
+        async with self._lock:
+            return await asyncio.to_thread(self._missing_days, start, end)
+
+    async def put_table(self, table_date: date, rates: dict[str, float], covered_until: date):
+        rows = [(table_date.isoformat(), code, rate) for code, rate in rates.items()]
+        async with self._lock:
+            await asyncio.to_thread(self._put, rows, _days(table_date, covered_until))
+
+    async def put_range(self, rows: list[tuple[date, str, float]], start: date, end: date):
+        rows = [(day.isoformat(), code, rate) for day, code, rate in rows]
+        async with self._lock:
+            await asyncio.to_thread(self._put, rows, _days(start, end))
+
+    def _table_on(self, on: date) -> dict[str, float] | None:
+        row = self._conn.execute('SELECT MAX(day) FROM rates WHERE day <= ?', (on.isoformat(),)).fetchone()
+        if not row or row[0] is None:
+            return None
+        cursor = self._conn.execute('SELECT char_code, rate FROM rates WHERE day = ?', (row[0],))
+        return dict(cursor.fetchall())
+
+    def _missing_days(self, start: date, end: date) -> list[date]:
+        cursor = self._conn.execute(
+            'SELECT day FROM coverage WHERE day BETWEEN ? AND ?', (start.isoformat(), end.isoformat())
+        )
+        covered = {date.fromisoformat(day) for (day,) in cursor}
+        return [day for day in _days(start, end) if day not in covered]
+
+    def _put(self, rows: list[tuple[str, str, float]], covered: list[date]):
+        with self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO rates (day, char_code, rate) VALUES (?, ?, ?)', rows)
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO coverage (day) VALUES (?)', [(day.isoformat(),) for day in covered]
+            )
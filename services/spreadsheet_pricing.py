@@ -0,0 +1,205 @@
+import itertools
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from config.config import UserCalcConfig
+from services.calculator import AGE_CATEGORIES, COST_FIELDS, CostCalculator
+
+REQUIRED_COLUMNS = ('year', 'country', 'cost')
+CSV_SNIFF_BYTES = 64 * 1024
+
+ENGINE_TYPES = {
+    'ice': 'ice', 'electro': 'electro', 'hybrid': 'ice',
+    'parallel_hybrid': 'ice', 'sequential_hybrid': 'electro',
+    'двс': 'ice', 'электро': 'electro', 'гибрид': 'ice'
+}
+COUNTRIES = {'china': 'china', 'korea': 'korea', 'китай': 'china', 'корея': 'korea'}
+KAZAN_ANSWERS = {
+    'yes': 'yes', 'no': 'no', 'да': 'yes', 'нет': 'no',
+    'true': 'yes', 'false': 'no', '1': 'yes', '0': 'no'
+}
+
+
+class SpreadsheetError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class SpreadsheetSummary:
+    rows: int
+    priced: int
+
+
+def _header_name(value) -> str:
+    return str(value).strip().lower() if value is not None else ''
+
+
+def _sniff_csv(path: str) -> tuple[str, str]:
+    with open(path, 'rb') as f:
+        sample = f.read(CSV_SNIFF_BYTES)
+    try:
+        text = sample.decode('utf-8-sig')
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut by the sample boundary is still UTF-8.
+        if e.start < len(sample) - 3:
+            text = sample.decode('cp1251', errors='replace')
+            encoding = 'cp1251'
+        else:
+            text = sample[:e.start].decode('utf-8-sig')
+            encoding = 'utf-8-sig'
+    first_line = text.split('\n', 1)[0]
+    delimiter = max(',;\t', key=first_line.count)
+    return encoding, delimiter
+
+
+def _read_csv(path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    encoding, delimiter = _sniff_csv(path)
+    with pd.read_csv(path, sep=delimiter, encoding=encoding, dtype=str, chunksize=chunk_rows,
+                     skipinitialspace=True) as reader:
+        for chunk in reader:
+            chunk.columns = [_header_name(c) for c in chunk.columns]
+            yield chunk
+
+
+def _read_xlsx(path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [_header_name(c) for c in header]
+        width = len(columns)
+        while chunk := list(itertools.islice(rows, chunk_rows)):
+            yield pd.DataFrame([(row + (None,) * width)[:width] for row in chunk], columns=columns)
+    finally:
+        workbook.close()
+
+
+def _numbers(chunk: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in chunk:
+        return np.full(len(chunk), np.nan)
+    values = chunk[column]
+    if not pd.api.types.is_numeric_dtype(values):
+        values = (values.astype('string')
+                  .str.replace(r'\s', '', regex=True)
+                  .str.replace(',', '.', regex=False))
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _codes(chunk: pd.DataFrame, column: str, mapping: dict[str, str], default: str) -> np.ndarray:
+    if column not in chunk:
+        return np.full(len(chunk), default, dtype=object)
+    values = chunk[column].astype('string').str.strip().str.lower()
+    codes = values.map(mapping, na_action='ignore')
+    codes[values.isna() | (values == '')] = default
+    return codes.fillna('').to_numpy(dtype=object)
+
+
+def _age_codes(chunk: pd.DataFrame, now: datetime) -> np.ndarray:
+    years = _numbers(chunk, 'year')
+    # Same thresholds as get_age_category_val, with the month taken as January.
+    age_in_months = (now.year - years) * 12 + (now.month - 1)
+    age = np.select(
+        [age_in_months < 36, age_in_months <= 60, age_in_months > 60],
+        ['year_less_3', 'year_3_5', 'year_more_5'], ''
+    ).astype(object)
+    given = _codes(chunk, 'year', {code: code for code in AGE_CATEGORIES}, '')
+    return np.where(given != '', given, age)
+
+
+# Normalizes one chunk into calculate_batch inputs plus a per-row error message
+# ('' for rows that can be priced).
+def _prepare(chunk: pd.DataFrame, now: datetime) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    age = _age_codes(chunk, now)
+    engine_type = _codes(chunk, 'engine_type', ENGINE_TYPES, 'ice')
+    country = _codes(chunk, 'country', COUNTRIES, '')
+    is_from_kazan = _codes(chunk, 'is_from_kazan', KAZAN_ANSWERS, 'yes')
+    cost = _numbers(chunk, 'cost')
+    volume = _numbers(chunk, 'volume')
+    power = np.nan_to_num(_numbers(chunk, 'power'))
+    is_electro = engine_type == 'electro'
+    volume = np.where(is_electro, 0.0, volume)
+
+    error = np.full(len(chunk), '', dtype=object)
+    checks = (
+        (age == '', 'не указан год выпуска'),
+        (engine_type == '', 'неизвестный тип двигателя'),
+        (country == '', 'страна должна быть china или korea'),
+        (is_from_kazan == '', 'is_from_kazan должно быть yes или no'),
+        (~(cost > 0), 'не указана цена'),
+        (~is_electro & ~(volume > 0), 'не указан объём двигателя'),
+        (is_electro & ~(power > 0), 'не указана мощность'),
+    )
+    for failed, message in checks:
+        error[failed & (error == '')] = message
+
+    inputs = {
+        'age': age, 'cost': cost, 'country': country, 'volume': volume,
+        'engine_type': engine_type, 'is_from_kazan': is_from_kazan, 'power': power
+    }
+    return inputs, error
+
+
+def _cell(value):
+    return None if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)) else value
+
+
+# Prices an uploaded CSV/XLSX of cars and writes the result to `destination` as XLSX.
+# The input is read `chunk_rows` rows at a time and each chunk is priced with one
+# calculate_batch call, while the write-only workbook streams rows to disk, so memory
+# use does not grow with the number of rows.
+def price_spreadsheet(source: str, file_name: str, destination: str, rates: dict[str, float],
+                      calc_config: UserCalcConfig, chunk_rows: int) -> SpreadsheetSummary:
+    calculator = CostCalculator(rates, calc_config)
+    now = datetime.now()
+    reader = _read_xlsx if file_name.lower().endswith('.xlsx') else _read_csv
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Расчёт')
+    columns = None
+    total = priced = 0
+    try:
+        for chunk in reader(source, chunk_rows):
+            if columns is None:
+                missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+                if missing:
+                    raise SpreadsheetError(f"нет столбцов: {', '.join(missing)}")
+                columns = [c for c in chunk.columns if c]
+                sheet.append([*columns, *COST_FIELDS, 'error'])
+
+            inputs, error = _prepare(chunk, now)
+            valid = error == ''
+            costs = {field: [None] * len(chunk) for field in COST_FIELDS}
+            if valid.any():
+                result = calculator.calculate_batch(*(values[valid] for values in inputs.values()))
+                positions = np.flatnonzero(valid)
+                for field in COST_FIELDS:
+                    column = costs[field]
+                    for position, value in zip(positions.tolist(), np.round(result[field], 2).tolist()):
+                        column[position] = value
+
+            source_values = [chunk[c].tolist() for c in columns]
+            for i in range(len(chunk)):
+                sheet.append([
+                    *(_cell(values[i]) for values in source_values),
+                    *(costs[field][i] for field in COST_FIELDS),
+                    error[i] or None
+                ])
+            total += len(chunk)
+            priced += int(valid.sum())
+    except (UnicodeDecodeError, ValueError, zipfile.BadZipFile, InvalidFileException, pd.errors.ParserError) as e:
+        raise SpreadsheetError(f"не удалось прочитать файл: {e}") from e
+
+    if columns is None:
+        raise SpreadsheetError("файл пустой")
+    workbook.save(destination)
+    return SpreadsheetSummary(total, priced)
@@ -0,0 +1,60 @@
+import time
+from collections import OrderedDict
+
+from aiogram import Bot
+from aiogram.enums import ChatMemberStatus
+
+from config.config import Config
+
+SUBSCRIBED_STATUSES = (ChatMemberStatus.MEMBER, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.CREATOR)
+
+
+# Per-user result of the channel membership check. Members are trusted for
+# `positive_ttl` seconds, non-members are re-checked after the shorter `negative_ttl`,
+# and the least recently used users are evicted past `max_size`.
+class SubscriptionCache:
+    def __init__(self, positive_ttl: float, negative_ttl: float, max_size: int):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[int, tuple[bool, float]] = OrderedDict()
+
+    def get(self, user_id: int) -> bool | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        is_member, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return is_member
+
+    def set(self, user_id: int, is_member: bool):
+        ttl = self.positive_ttl if is_member else self.negative_ttl
+        self._entries[user_id] = (is_member, time.monotonic() + ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+
+class SubscriptionChecker:
+    def __init__(self, config: Config):
+        self.config = config
+        settings = config.subscription
+        self.cache = SubscriptionCache(settings.positive_ttl, settings.negative_ttl, settings.max_size)
+
+    async def is_subscribed(self, bot: Bot, user_id: int, force: bool = False) -> bool:
+        if user_id in self.config.bot.admin_ids:
+            return True
+        if not force:
+            cached = self.cache.get(user_id)
+            if cached is not None:
+                return cached
+        member = await bot.get_chat_member(chat_id=self.config.bot.channel_id, user_id=user_id)
+        is_member = member.status in SUBSCRIBED_STATUSES
+        self.cache.set(user_id, is_member)
+        return is_member
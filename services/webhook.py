@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import signal
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config.config import WebhookSettings
+
+logger = logging.getLogger(__name__)
+
+
+# Webhook endpoint that acknowledges an update as soon as it is queued and leaves the
+# processing to a fixed pool of workers. When the queue is full it answers 503, so
+# Telegram keeps the update and redelivers it later instead of the bot piling up tasks.
+class QueuedRequestHandler(SimpleRequestHandler):
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, settings: WebhookSettings, **data: Any):
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True,
+                         secret_token=settings.secret or None, **data)
+        self.settings = settings
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=settings.queue_size)
+        self._workers: list[asyncio.Task] = []
+        self._accepting = True
+
+    def register(self, app: web.Application, /, path: str, **kwargs: Any) -> None:
+        super().register(app, path, **kwargs)
+        app.on_startup.append(self._start_workers)
+
+    async def _start_workers(self, *a: Any, **kw: Any) -> None:
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.settings.workers)]
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not self.verify_secret(request.headers.get('X-Telegram-Bot-Api-Secret-Token', ''), self.bot):
+            return web.Response(body='Unauthorized', status=401)
+        if not self._accepting:
+            return web.Response(body='Shutting down', status=503, headers={'Retry-After': '5'})
+        try:
+            update = await request.json(loads=self.bot.session.json_loads)
+        except ValueError:
+            return web.Response(body='Bad Request', status=400)
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            logger.debug(f"Webhook queue is full ({self._queue.maxsize}), asking Telegram to retry")
+            return web.Response(body='Busy', status=503, headers={'Retry-After': '1'})
+        return web.json_response({}, dumps=self.bot.session.json_dumps)
+
+    __call__ = handle
+
+    async def _worker(self):
+        while True:
+            update = await self._queue.get()
+            try:
+                result = await self.dispatcher.feed_raw_update(bot=self.bot, update=update, **self.data)
+                if isinstance(result, TelegramMethod):
+                    await self.dispatcher.silent_call_request(bot=self.bot, result=result)
+            except Exception as e:
+                logger.exception(f"Failed to process update {update.get('update_id')}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def close(self) -> None:
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.settings.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self._queue.qsize()} queued updates after the drain timeout")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await super().close()
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher, settings: WebhookSettings, **data: Any):
+    app = web.Application()
+    QueuedRequestHandler(dp, bot, settings, **data).register(app, path=settings.path)
+    setup_application(app, dp, bot=bot, **data)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, settings.host, settings.port).start()
+    logger.info(f"Webhook server listening on {settings.host}:{settings.port}{settings.path}")
+
+    # Without a public URL the server only serves local replays (scripts/replay_updates.py).
+    # The webhook is never deleted on shutdown, so Telegram holds new updates during a restart.
+    if settings.base_url:
+        await bot.set_webhook(
+            url=settings.base_url.rstrip('/') + settings.path,
+            secret_token=settings.secret or None,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=settings.max_connections,
+            drop_pending_updates=False
+        )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    try:
+        await stop.wait()
+    finally:
+        await runner.cleanup()